@@ -0,0 +1,43 @@
+"""
+Gunicorn configuration, read from the working directory.
+
+The app is preloaded in the master so the word indexes and the feedback
+matrix are loaded once and shared copy-on-write by every worker. Each
+worker then warms the board caches before it takes requests.
+
+Environment:
+    WEB_CONCURRENCY        number of workers (set by Heroku from the dyno size)
+    GUNICORN_THREADS       threads per worker, more than 1 selects gthread workers
+    GUNICORN_WORKER_CLASS  worker class, e.g. uvicorn.workers.UvicornWorker with ranker.asgi
+    GUNICORN_TIMEOUT       seconds before a silent worker is restarted
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv('GUNICORN_THREADS', '1'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread' if threads > 1 else 'sync')
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+preload_app = True
+
+
+def when_ready(server):
+    from django.db import connections
+    from ranker.core.services.warmup import preload
+
+    preload()
+    # Workers must not share the master's database connections
+    connections.close_all()
+
+
+def post_fork(server, worker):
+    from django.db import connections
+    from ranker.core.services.warmup import warm_caches
+
+    try:
+        warm_caches()
+    except Exception:
+        server.log.exception('Cache warm-up failed')
+    finally:
+        connections.close_all()
@@ -0,0 +1,17 @@
+"""
+ASGI config for ranker project.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Set RANKER_ASYNC_READ_VIEWS=1 so the read-only endpoints use their async views.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/4.0/howto/deployment/asgi/
+"""
+
+import os
+
+from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ranker.settings.prod')
+
+application = get_asgi_application()
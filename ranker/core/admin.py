@@ -1,10 +1,55 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.db import transaction
+from django.db.models import F
 from django.utils.translation import gettext_lazy as _
 
-from .models import Match
+from .models import Match, Season, defer_recompute, request_recompute
+from .pagination import EstimatedCountPaginator
 
 admin.site.site_title = _('Ranker Content Management')
 admin.site.site_header = _('Ranker Content Management')
 admin.site.index_title = _('Content Management')
 
-admin.site.register([Match])
+
+@admin.register(Match)
+class MatchAdmin(admin.ModelAdmin):
+    """
+    Edits, list edits and bulk actions recompute ratings once per request
+    instead of once per match, deletes are repaired in one batch.
+    """
+    list_display = ['id', 'datetime', 'winner', 'winning_score', 'loser', 'losing_score', 'winner_rating', 'loser_rating']
+    list_display_links = ['id']
+    list_editable = ['winning_score', 'losing_score']
+    list_select_related = ['winner', 'loser']
+    list_per_page = 50
+    raw_id_fields = ['winner', 'loser']
+    search_fields = ['=winner__username', '=loser__username']
+    ordering = ['-id']
+    paginator = EstimatedCountPaginator
+    # No second COUNT(*) of the whole table next to the filtered one
+    show_full_result_count = False
+    actions = ['reverse_result', 'recompute_ratings']
+
+    def changelist_view(self, request, extra_context=None):
+        with defer_recompute():
+            return super().changelist_view(request, extra_context)
+
+    def changeform_view(self, request, object_id=None, form_url='', extra_context=None):
+        with defer_recompute():
+            return super().changeform_view(request, object_id, form_url, extra_context)
+
+    @admin.action(description=_('Reverse the result of selected matches'))
+    def reverse_result(self, request, queryset):
+        with transaction.atomic():
+            # Winner and loser swap, scores stay with the winning and losing side
+            reversed_count = queryset.update(winner=F('loser'), loser=F('winner'))
+            request_recompute()
+        self.message_user(request, _('Reversed %d matches, ratings are being recomputed') % reversed_count, messages.SUCCESS)
+
+    @admin.action(description=_('Recompute ratings'))
+    def recompute_ratings(self, request, queryset):
+        request_recompute()
+        self.message_user(request, _('Ratings are being recomputed'), messages.SUCCESS)
+
+
+admin.site.register([Season])
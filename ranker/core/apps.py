@@ -2,3 +2,6 @@ from django.apps import AppConfig
 
 class CoreConfig(AppConfig):
     name = 'ranker.core'
+
+    def ready(self):
+        from ranker.core import signals  # noqa: F401
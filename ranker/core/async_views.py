@@ -0,0 +1,124 @@
+"""
+Async read-only endpoints for the ASGI application (ranker/asgi.py).
+
+Django 4.0 has no async query interface yet, so the ORM work of a view is
+written as plain functions and run with ``run_query``: each call goes to the
+thread pool (not the single thread sync_to_async uses by default), which is
+what lets independent queries of one request run concurrently with
+asyncio.gather while the event loop keeps serving other requests.
+
+Enable them with ASYNC_READ_VIEWS; the URL confs then route the same paths to
+the async classes through ``read_view``.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from ranker.users.authentication import CachedTokenAuthentication
+
+
+def _in_thread(func, *args, **kwargs):
+    try:
+        return func(*args, **kwargs)
+    finally:
+        # Pool threads live past the request, release their connection like
+        # the request_finished handler does for request threads
+        close_old_connections()
+
+
+async def run_query(func, *args, **kwargs):
+    """Run a synchronous ORM function in the thread pool."""
+    return await sync_to_async(_in_thread, thread_sensitive=False)(func, *args, **kwargs)
+
+
+class APIJsonResponse(HttpResponse):
+    """JSON encoded the way DRF renders it (lazy strings, dates, decimals, numpy scalars)."""
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(JSONEncoder(separators=(',', ':')).encode(data), **kwargs)
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of APIView for GET endpoints: authenticates with
+    the same classes and rejects anonymous requests like IsAuthenticated.
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    http_method_names = ['get']
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        A coroutine function view awaiting dispatch: Django 4.0 only runs
+        function views natively (class based async handlers arrive in 4.1).
+        """
+        for key in initkwargs:
+            if key in cls.http_method_names:
+                raise TypeError(f'The method name {key} is not accepted as a keyword argument to {cls.__name__}().')
+            if not hasattr(cls, key):
+                raise TypeError(f'{cls.__name__}() received an invalid keyword {key!r}.')
+
+        async def view(request, *args, **kwargs):
+            self = cls(**initkwargs)
+            self.setup(request, *args, **kwargs)
+            return await self.dispatch(request, *args, **kwargs)
+
+        view.view_class = cls
+        view.view_initkwargs = initkwargs
+        view.__doc__ = cls.__doc__
+        view.__module__ = cls.__module__
+        view.__annotations__ = cls.dispatch.__annotations__
+        view.__dict__.update(cls.dispatch.__dict__)
+        return view
+
+    def authenticate(self, request):
+        """DRF request wrapping request once authenticated, or the error to answer with."""
+        drf_request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        try:
+            user = drf_request.user
+        except exceptions.APIException as error:
+            return None, error
+        if not user or not user.is_authenticated:
+            return None, exceptions.NotAuthenticated()
+        return drf_request, None
+
+    def error_response(self, request, error):
+        """The response APIView.handle_exception gives an authentication or permission error."""
+        authenticate_header = None
+        if isinstance(error, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            # 401 only when the first authenticator has a WWW-Authenticate challenge, like DRF
+            authenticate_header = self.authentication_classes[0]().authenticate_header(request)
+            if not authenticate_header:
+                error.status_code = status.HTTP_403_FORBIDDEN
+        response = APIJsonResponse({'detail': error.detail}, status=error.status_code)
+        if authenticate_header:
+            response['WWW-Authenticate'] = authenticate_header
+        return response
+
+    async def dispatch(self, request, *args, **kwargs):
+        drf_request, error = await run_query(self.authenticate, request)
+        if error is not None:
+            return self.error_response(request, error)
+
+        # Handlers get the DRF request, for query_params and the authenticated user
+        self.request = drf_request
+        response = super().dispatch(drf_request, *args, **kwargs)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+
+def read_view(sync_view, async_view):
+    """The async implementation of an endpoint when ASYNC_READ_VIEWS is on, the sync one otherwise."""
+    if getattr(settings, 'ASYNC_READ_VIEWS', False):
+        return async_view.as_view()
+    return sync_view.as_view()
@@ -0,0 +1,79 @@
+"""
+Bootstrap replicates of the Elo replay, numpy only.
+
+A replicate draws as many matches as the season has, with replacement, and
+replays them in time order. The replicates of a batch are replayed in
+lockstep, one vectorized Elo update per match position, so the python loop
+runs once per match whatever the batch size. Batches run in a process pool:
+the match arrays are placed in shared memory once and every worker maps
+them instead of receiving a copy.
+
+Workers are spawned, not forked, and this module imports neither Django nor
+the models: they never inherit the parent's database connections.
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Replicates replayed together by a worker, the resampled indexes of a batch
+# take batch * matches * 4 bytes
+BOOTSTRAP_BATCH = 128
+
+
+def expected_score(rating, opponent_rating):
+    """EloRating.calculate_expected_score over arrays."""
+    return 1 / (1 + 10 ** ((opponent_rating - rating) / 400))
+
+
+def replay(starting: np.ndarray, winners: np.ndarray, losers: np.ndarray, k_factor: float) -> np.ndarray:
+    """
+    Final ratings (replicates x players) of replicates given as (replicates x
+    matches) arrays of player indexes. Ratings are truncated after each match
+    like EloRating.calculate_new_ratings.
+    """
+    ratings = np.tile(starting.astype(np.float64), (winners.shape[0], 1))
+    rows = np.arange(winners.shape[0])
+    for position in range(winners.shape[1]):
+        winner, loser = winners[:, position], losers[:, position]
+        winner_rating, loser_rating = ratings[rows, winner], ratings[rows, loser]
+        ratings[rows, winner] = np.trunc(winner_rating + k_factor * (1 - expected_score(winner_rating, loser_rating)))
+        ratings[rows, loser] = np.trunc(loser_rating + k_factor * (0 - expected_score(loser_rating, winner_rating)))
+    return ratings
+
+
+def _replicate_batch(shm_name: str, n_matches: int, starting: np.ndarray, size: int, seed, k_factor: float) -> np.ndarray:
+    # Attached, the parent unlinks the block (workers share its resource tracker)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        matches = np.ndarray((2, n_matches), dtype=np.int32, buffer=shm.buf)
+        rng = np.random.default_rng(seed)
+        picks = np.sort(rng.integers(0, n_matches, size=(size, n_matches), dtype=np.int32), axis=1)
+        ratings = replay(starting, matches[0][picks], matches[1][picks], k_factor)
+        del matches
+    finally:
+        shm.close()
+    return ratings.astype(np.int32)
+
+
+def bootstrap_ratings(starting: np.ndarray, winners: np.ndarray, losers: np.ndarray, *, replicates: int,
+                      k_factor: float, workers: int = None, seed: int = None, batch: int = BOOTSTRAP_BATCH) -> np.ndarray:
+    """Final ratings (replicates x players) of bootstrap replicates of the time ordered matches."""
+    n_matches = len(winners)
+    shm = shared_memory.SharedMemory(create=True, size=2 * n_matches * np.dtype(np.int32).itemsize)
+    try:
+        matches = np.ndarray((2, n_matches), dtype=np.int32, buffer=shm.buf)
+        matches[0], matches[1] = winners, losers
+        sizes = [min(batch, replicates - start) for start in range(0, replicates, batch)]
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            batches = list(pool.map(
+                _replicate_batch, repeat(shm.name), repeat(n_matches), repeat(starting), sizes, seeds, repeat(k_factor)
+            ))
+        del matches
+    finally:
+        shm.close()
+        shm.unlink()
+    return np.concatenate(batches)
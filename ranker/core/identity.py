@@ -0,0 +1,72 @@
+"""
+Request scoped identity map.
+
+identity_map_middleware gives every request an empty map, and the services
+load players and ratings through it: rows already loaded during the request
+are reused, missing ones are fetched together with one in_bulk query. Outside
+a request (jobs, commands) each call gets a map of its own, use
+identity_scope to share one across several calls.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.utils.decorators import sync_and_async_middleware
+
+_identity_map = ContextVar('identity_map', default=None)
+
+
+class IdentityMap(object):
+    """Model instances loaded so far, by model and primary key."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def add(self, *instances):
+        for instance in instances:
+            self.rows.setdefault(type(instance), {})[instance.pk] = instance
+
+    def get_many(self, model, pks) -> dict:
+        """Instances of the given primary keys that exist, loading the missing ones in one query."""
+        rows = self.rows.setdefault(model, {})
+        missing = {pk for pk in pks if pk not in rows}
+        if missing:
+            rows.update(model.objects.in_bulk(list(missing)))
+        return {pk: rows[pk] for pk in pks if pk in rows}
+
+    def get(self, model, pk):
+        """Like model.objects.get(pk=pk), raises model.DoesNotExist."""
+        try:
+            return self.get_many(model, [pk])[pk]
+        except KeyError:
+            raise model.DoesNotExist(f'{model.__name__} {pk} does not exist')
+
+
+def current() -> IdentityMap:
+    """The map of the current request or scope, a new one outside of them."""
+    identity_map = _identity_map.get()
+    return identity_map if identity_map is not None else IdentityMap()
+
+
+@contextmanager
+def identity_scope():
+    token = _identity_map.set(IdentityMap())
+    try:
+        yield _identity_map.get()
+    finally:
+        _identity_map.reset(token)
+
+
+@sync_and_async_middleware
+def identity_map_middleware(get_response):
+    """Each request loads a player or rating at most once, under WSGI and ASGI alike."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            # Queries run with run_query get a copy of this context, and so the map
+            with identity_scope():
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with identity_scope():
+                return get_response(request)
+    return middleware
@@ -0,0 +1,29 @@
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from ranker.core.models import PlayerRating, Season, RECOMPUTE_RATINGS_JOB
+from ranker.core.services import data, repair, snapshots
+from ranker.jobs.registry import handler
+
+
+@handler(RECOMPUTE_RATINGS_JOB)
+def recompute_ratings():
+    """Replay the open season to rebuild player ratings, after matches were edited or a season closed."""
+    PlayerRating.generate_ratings()
+    snapshots.drop_snapshots(Season.current())
+    transaction.on_commit(data.invalidate_leaderboard)
+
+
+@handler(repair.REPAIR_RATINGS_JOB)
+def repair_ratings(since: str, players: list):
+    """Replay forward from the earliest deleted match, for the players it affects."""
+    repair.repair_ratings(since=since, players=players)
+    since = parse_datetime(since)
+    snapshots.drop_snapshots(snapshots.season_at(since), since=since)
+    transaction.on_commit(data.invalidate_leaderboard)
+
+
+@handler(snapshots.SNAPSHOT_RATINGS_JOB)
+def build_rating_snapshots():
+    """Take the rating snapshots missing since the last ones, after others were dropped."""
+    snapshots.build_all_snapshots()
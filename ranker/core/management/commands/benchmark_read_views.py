@@ -0,0 +1,60 @@
+import statistics
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+READ_PATHS = [
+    '/api/v1/players/leaderboard',
+    '/api/v1/wordle/today',
+    '/api/v1/wordle/stats',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load the read-only endpoints of running servers with concurrent requests '
+        'and compare throughput, e.g. the WSGI stack against the ASGI one.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='+', help='Base URLs of the servers, e.g. http://localhost:8000')
+        parser.add_argument('--token', required=True, help='API token of the player to request as')
+        parser.add_argument('--path', action='append', dest='paths', help='Path to request (repeatable)')
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=1000, help='Requests per path and server')
+
+    def fetch(self, url, token):
+        request = urllib.request.Request(url, headers={'Authorization': f'Token {token}'})
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request) as response:
+                response.read()
+                ok = response.status == 200
+        except (urllib.error.URLError, ConnectionError):
+            ok = False
+        return time.perf_counter() - start, ok
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or READ_PATHS
+        n_requests = options['requests']
+
+        for path in paths:
+            self.stdout.write(path)
+            for base_url in options['urls']:
+                url = base_url.rstrip('/') + path
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+                    start = time.perf_counter()
+                    results = list(pool.map(lambda _: self.fetch(url, options['token']), range(n_requests)))
+                    elapsed = time.perf_counter() - start
+
+                latencies = sorted(latency for latency, _ in results)
+                errors = sum(1 for _, ok in results if not ok)
+                self.stdout.write(
+                    f'  {base_url}: {n_requests / elapsed:.1f} req/s, '
+                    f'p50 {statistics.median(latencies) * 1000:.1f} ms, '
+                    f'p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f} ms, '
+                    f'{errors} errors'
+                )
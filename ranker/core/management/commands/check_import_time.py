@@ -0,0 +1,70 @@
+import os
+import re
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker or management command imports before doing any work
+STARTUP_CODE = (
+    'import django; django.setup(); '
+    'from django.urls import get_resolver; get_resolver().url_patterns'
+)
+IMPORT_TIME_LINE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$')
+DEFAULT_FORBIDDEN = ['pandas', 'numpy']
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the imports done at startup (settings, apps and URL conf) with '
+        'python -X importtime and fail when they exceed the budget or pull in heavy modules.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--budget', type=int, default=getattr(settings, 'STARTUP_IMPORT_BUDGET_MS', 1500),
+            help='Maximum cumulative import time in milliseconds'
+        )
+        parser.add_argument(
+            '--forbid', action='append',
+            help=f'Module that must not be imported at startup (default: {", ".join(DEFAULT_FORBIDDEN)})'
+        )
+        parser.add_argument('--top', type=int, default=15, help='Number of slowest top level imports to list')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_CODE],
+            capture_output=True, text=True, env=os.environ.copy()
+        )
+        wall_time = (time.perf_counter() - start) * 1000
+        if process.returncode:
+            raise CommandError(f'Startup failed:\n{process.stderr[-2000:]}')
+
+        top_level = []
+        imported = set()
+        for line in process.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match is None:
+                continue
+            _, cumulative, indent, module = match.groups()
+            imported.add(module.split('.')[0])
+            if len(indent) == 0:
+                top_level.append((int(cumulative) / 1000, module))
+
+        total = sum(cumulative for cumulative, _ in top_level)
+        self.stdout.write(f'Startup imports: {total:.0f} ms (process wall time {wall_time:.0f} ms, budget {options["budget"]} ms)')
+        for cumulative, module in sorted(top_level, reverse=True)[:options['top']]:
+            self.stdout.write(f'  {cumulative:8.1f} ms  {module}')
+
+        errors = []
+        forbidden = [module for module in options['forbid'] or DEFAULT_FORBIDDEN if module in imported]
+        if forbidden:
+            errors.append(f'imported at startup: {", ".join(forbidden)}')
+        if total > options['budget']:
+            errors.append(f'{total:.0f} ms is over the {options["budget"]} ms budget')
+        if errors:
+            raise CommandError('; '.join(errors))
+        self.stdout.write(self.style.SUCCESS('Within budget'))
@@ -0,0 +1,84 @@
+import datetime
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ranker.core.models import Match, PlayerRating, RatingSnapshot
+from ranker.jobs.models import Job
+from ranker.wordle.models import ActiveWordle, ArchivedWordle, Wordle, WordleRollup
+
+# Tables that grow with play, a full scan of any of them is a regression
+LARGE_TABLES = ['match', 'rating_snapshot', 'wordle', 'wordle_archive', 'active_wordle', 'wordle_rollup', 'job']
+
+
+def hot_queries() -> list:
+    """(name, queryset) of the queries run on every request, replay or sweep."""
+    today = timezone.now().date()
+    today_start = datetime.datetime.combine(today, datetime.time.min)
+    player_id = 1
+
+    return [
+        ('rating replay', Match.objects.order_by('datetime')),
+        ('season replay', Match.objects.filter(datetime__gte=today_start).order_by('datetime')),
+        ('player wins', Match.objects.filter(winner_id=player_id)),
+        ('player losses', Match.objects.filter(loser_id=player_id)),
+        ('leaderboard', PlayerRating.objects.order_by('-rating')[:5]),
+        ('rating snapshot', RatingSnapshot.objects.filter(season=None, taken_at__lte=today_start).order_by('-taken_at')[:1]),
+        ('today board', Wordle.objects.filter(date=today).order_by('fail', 'guesses', 'time')),
+        ('streak', Wordle.objects.filter(player_id=player_id, date__lte=today).order_by('-date')),
+        ('archived streak', ArchivedWordle.objects.filter(player_id=player_id, date__lte=today).order_by('-date')),
+        ('wall of shame', Wordle.objects.filter(fail=True).order_by('-id')[:50]),
+        ('archive batch', Wordle.objects.filter(date__lt=today).order_by('date')[:1000]),
+        ('wordle sweep', ActiveWordle.objects.filter(start_time__lt=today_start)),
+        ('rollup period', WordleRollup.objects.filter(
+            granularity=WordleRollup.DAY, player_id=player_id, word='', period_start=today
+        )),
+        ('job claim', Job.objects.filter(status=Job.QUEUED).order_by('id')[:1]),
+    ]
+
+
+def full_scans(plan: str) -> list:
+    """Large tables the plan reads without an index."""
+    if connection.vendor == 'postgresql':
+        scanned = re.findall(r'Seq Scan on (\w+)', plan)
+    elif connection.vendor == 'sqlite':
+        scanned = [
+            match.group(1) for match in re.finditer(r'\bSCAN (\w+)(.*)', plan)
+            if 'INDEX' not in match.group(2)
+        ]
+    else:
+        raise CommandError(f'Query plans are not checked on {connection.vendor}')
+    return sorted(set(scanned) & set(LARGE_TABLES))
+
+
+class Command(BaseCommand):
+    help = (
+        'EXPLAIN the hot queries and fail when one of them scans a large table '
+        'without an index. Run it after changing a model index or one of these queries.'
+    )
+
+    def handle(self, *args, **options):
+        offending = []
+        for name, queryset in hot_queries():
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    # Small test tables are cheaper to scan, make the planner
+                    # show the index it would use on production sized tables
+                    with connection.cursor() as cursor:
+                        cursor.execute('SET LOCAL enable_seqscan = off')
+                plan = queryset.explain()
+
+            scans = full_scans(plan)
+            if scans:
+                offending.append(name)
+                self.stdout.write(self.style.ERROR(f'{name}: full scan of {", ".join(scans)}'))
+            else:
+                self.stdout.write(f'{name}: ok')
+            if scans or options['verbosity'] > 1:
+                self.stdout.write('\n'.join(f'    {line}' for line in plan.splitlines()))
+
+        if offending:
+            raise CommandError(f'Unindexed hot queries: {", ".join(offending)}')
+        self.stdout.write(self.style.SUCCESS('All hot queries use an index'))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from ranker.core.models import Match, Season
+
+
+class Command(BaseCommand):
+    help = (
+        'Close the open season, freezing its standings, and open the next one. '
+        'Without any season, everything played so far becomes the first season.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Name of the season to open')
+        parser.add_argument(
+            '--carry-over', choices=[choice for choice, _ in Season.CARRY_OVER_CHOICES],
+            default=Season.CARRY_OVER_FULL, help='How the new season starts from the final ratings'
+        )
+        parser.add_argument(
+            '--soft-reset-factor', type=float, default=0.5,
+            help='Share of the distance from the default rating kept by a soft reset'
+        )
+        parser.add_argument('--first-name', default='Season 1', help='Name of the first season when there is none')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['soft_reset_factor'] <= 1:
+            raise CommandError('--soft-reset-factor must be between 0 and 1')
+
+        season = Season.current()
+        if season is None:
+            first_match = Match.objects.order_by('datetime').first()
+            season = Season.objects.create(
+                name=options['first_name'],
+                start=first_match.datetime if first_match else timezone.now(),
+            )
+
+        next_season = season.close(
+            next_name=options['name'],
+            carry_over=options['carry_over'],
+            soft_reset_factor=options['soft_reset_factor'],
+        )
+        season.refresh_from_db()
+        self.stdout.write(
+            f'Closed {season}: {season.match_count} matches, {season.player_count} players. '
+            f'Opened {next_season} ({next_season.carry_over} carry over)'
+        )
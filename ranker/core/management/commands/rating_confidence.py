@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ranker.core.services import confidence
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute every player\'s rating confidence interval from bootstrap '
+        'replays of the open season, run in a process pool. Run it once a day.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--replicates', type=int, default=confidence.CONFIDENCE_REPLICATES)
+        parser.add_argument('--level', type=float, default=confidence.CONFIDENCE_LEVEL, help='Share of the replicates inside the interval')
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes, one per CPU by default')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['replicates'] < 1:
+            raise CommandError('--replicates must be positive')
+        if not 0 < options['level'] < 1:
+            raise CommandError('--level must be between 0 and 1')
+
+        began = time.perf_counter()
+        players = confidence.update_confidence(
+            replicates=options['replicates'], level=options['level'], workers=options['workers'], seed=options['seed']
+        )
+        self.stdout.write(
+            f'{options["replicates"]} replicates: intervals of {players} players in {time.perf_counter() - began:.1f} s'
+        )
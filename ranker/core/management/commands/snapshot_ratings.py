@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ranker.core.models import RatingSnapshot
+from ranker.core.services import snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        'Take the rating snapshots point in time queries (as_of) replay from, '
+        'one per match day and every RATING_SNAPSHOT_MATCHES matches. Run it once a day.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Drop every snapshot and take them again')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if options['rebuild']:
+                dropped, _ = RatingSnapshot.objects.all().delete()
+                self.stdout.write(f'Dropped {dropped} snapshots')
+            taken = snapshots.build_all_snapshots()
+        self.stdout.write(f'Took {taken} snapshots')
@@ -0,0 +1,119 @@
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from ranker.core.models import Match, PlayerRating
+from ranker.users.models import Player
+
+
+class Command(BaseCommand):
+    help = (
+        'Submit matches from concurrent threads and check that no rating update '
+        'was lost: every player must have one rated match per submitted match. '
+        'Reports the throughput of each concurrency level. The matches are '
+        'deleted and ratings rebuilt afterwards unless --keep is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--submitters', default='1,2,4,8', help='Comma separated numbers of concurrent submitters')
+        parser.add_argument('--matches', type=int, default=50, help='Matches submitted by each submitter')
+        parser.add_argument('--players', type=int, default=20, help='Number of players drawn from')
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--keep', action='store_true', help='Keep the submitted matches')
+
+    def handle(self, *args, **options):
+        levels = [int(level) for level in options['submitters'].split(',')]
+        player_ids = list(Player.objects.filter(is_active=True).order_by('id').values_list('id', flat=True)[:options['players']])
+        if len(player_ids) < 2:
+            raise CommandError('Needs at least two active players')
+
+        random.seed(options['seed'])
+        self.stdout.write(f'{connection.vendor}, {len(player_ids)} players, {options["matches"]} matches per submitter')
+
+        created = []
+        failed = False
+        baseline = None
+        try:
+            for submitters in levels:
+                before = dict(PlayerRating.objects.filter(player_id__in=player_ids).values_list('player_id', 'matches_rated'))
+                matches, errors, elapsed = self.submit(submitters, options['matches'], player_ids)
+                created += [match.id for match in matches]
+
+                lost = self.lost_updates(before, matches)
+                throughput = len(matches) / elapsed
+                baseline = baseline or throughput / submitters
+                line = (
+                    f'{submitters:3d} submitters: {len(matches)} matches in {elapsed:.2f} s, '
+                    f'{throughput:.0f}/s ({throughput / baseline / submitters:.0%} of linear), '
+                    f'{len(errors)} errors, {len(lost)} lost updates'
+                )
+                if lost or errors:
+                    failed = True
+                    self.stdout.write(self.style.ERROR(line))
+                    for error in errors[:5]:
+                        self.stdout.write(f'    {error}')
+                    for player_id, (expected, rated) in list(lost.items())[:5]:
+                        self.stdout.write(f'    player {player_id}: {expected} matches, {rated} rated')
+                else:
+                    self.stdout.write(line)
+        finally:
+            if created and not options['keep']:
+                Match.objects.filter(id__in=created).delete()
+                PlayerRating.generate_ratings()
+                self.stdout.write(f'Deleted the {len(created)} submitted matches and rebuilt ratings')
+
+        if failed:
+            raise CommandError('Concurrent submissions lost rating updates or failed')
+        self.stdout.write(self.style.SUCCESS('No lost updates'))
+
+    def submit(self, submitters: int, n_matches: int, player_ids: list):
+        matches = []
+        errors = []
+        lock = threading.Lock()
+        start = threading.Barrier(submitters + 1)
+
+        def submitter():
+            start.wait()
+            try:
+                for _ in range(n_matches):
+                    winner_id, loser_id = random.sample(player_ids, 2)
+                    try:
+                        match = Match.objects.create(
+                            winner_id=winner_id, loser_id=loser_id,
+                            winning_score=11, losing_score=random.randint(0, 9)
+                        )
+                    except Exception as error:
+                        with lock:
+                            errors.append(f'{type(error).__name__}: {error}')
+                    else:
+                        with lock:
+                            matches.append(match)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submitter) for _ in range(submitters)]
+        for thread in threads:
+            thread.start()
+        start.wait()
+        began = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        return matches, errors, time.perf_counter() - began
+
+    @staticmethod
+    def lost_updates(before: dict, matches: list) -> dict:
+        """Players whose rated match count did not grow by their number of new matches."""
+        expected = {}
+        for match in matches:
+            for player_id in (match.winner_id, match.loser_id):
+                expected[player_id] = expected.get(player_id, 0) + 1
+
+        after = dict(PlayerRating.objects.filter(player_id__in=list(expected)).values_list('player_id', 'matches_rated'))
+        return {
+            player_id: (count, after.get(player_id, 0) - before.get(player_id, 0))
+            for player_id, count in expected.items()
+            if after.get(player_id, 0) - before.get(player_id, 0) != count
+        }
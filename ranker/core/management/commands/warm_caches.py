@@ -0,0 +1,14 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ranker.core.services.warmup import warm_caches
+
+
+class Command(BaseCommand):
+    help = "Recompute the leaderboard and today's wordle board caches."
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        warm_caches(refresh=True)
+        self.stdout.write(f'Warmed caches in {time.perf_counter() - start:.2f}s')
@@ -0,0 +1,69 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:41
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0002_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Season',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=60)),
+                ('start', models.DateTimeField()),
+                ('end', models.DateTimeField(blank=True, null=True)),
+                ('carry_over', models.CharField(choices=[('full', 'Keep ratings'), ('soft', 'Pull ratings towards the default'), ('reset', 'Start everybody at the default')], default='full', max_length=5)),
+                ('soft_reset_factor', models.FloatField(default=0.5)),
+                ('closed', models.BooleanField(default=False)),
+                ('match_count', models.PositiveIntegerField(default=0)),
+                ('player_count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'season',
+                'verbose_name_plural': 'seasons',
+                'db_table': 'season',
+                'ordering': ['-start'],
+            },
+        ),
+        migrations.CreateModel(
+            name='SeasonStanding',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.PositiveIntegerField()),
+                ('rating', models.IntegerField()),
+                ('starting_rating', models.IntegerField()),
+                ('max_rating', models.IntegerField()),
+                ('wins', models.PositiveIntegerField(default=0)),
+                ('losses', models.PositiveIntegerField(default=0)),
+                ('points_won', models.PositiveIntegerField(default=0)),
+                ('points_lost', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='season_standings', to=settings.AUTH_USER_MODEL)),
+                ('season', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='standings', to='core.season')),
+            ],
+            options={
+                'verbose_name': 'season standing',
+                'verbose_name_plural': 'season standings',
+                'db_table': 'season_standing',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='season',
+            constraint=models.UniqueConstraint(condition=models.Q(('closed', False)), fields=('closed',), name='season_single_open'),
+        ),
+        migrations.AddIndex(
+            model_name='seasonstanding',
+            index=models.Index(fields=['season', 'rank'], name='season_standing_rank'),
+        ),
+        migrations.AddConstraint(
+            model_name='seasonstanding',
+            constraint=models.UniqueConstraint(fields=('season', 'player'), name='season_standing_player'),
+        ),
+    ]
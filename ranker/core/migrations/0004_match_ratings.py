@@ -0,0 +1,28 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_seasons'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='match',
+            name='loser_rating',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='match',
+            name='winner_rating',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='playerrating',
+            name='matches_rated',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:54
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_match_ratings'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingSnapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('taken_at', models.DateTimeField()),
+                ('match_count', models.PositiveIntegerField()),
+                ('ratings', models.JSONField()),
+                ('season', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rating_snapshots', to='core.season')),
+            ],
+            options={
+                'verbose_name': 'rating snapshot',
+                'verbose_name_plural': 'rating snapshots',
+                'db_table': 'rating_snapshot',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='ratingsnapshot',
+            index=models.Index(fields=['season', 'taken_at'], name='rating_snapshot_taken'),
+        ),
+    ]
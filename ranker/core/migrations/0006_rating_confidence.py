@@ -0,0 +1,32 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:57
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_player_search_trigram_index'),
+        ('core', '0005_rating_snapshots'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingConfidence',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_confidence', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('low', models.IntegerField()),
+                ('high', models.IntegerField()),
+                ('level', models.FloatField()),
+                ('replicates', models.PositiveIntegerField()),
+                ('computed', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'rating confidence',
+                'verbose_name_plural': 'rating confidences',
+                'db_table': 'rating_confidence',
+            },
+        ),
+    ]
@@ -1,12 +1,68 @@
-from django.db import models
-from django.db.models import Sum
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection, models, transaction
+from django.db.models import Q, Sum
 from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from ranker.core.rankings import EloRating
+from ranker.core.rankings import DEFAULT_ELO_RATING, EloRating
 
+from ranker.jobs.models import Job
 from ranker.users.models import Player
 
+RECOMPUTE_RATINGS_JOB = 'ratings.recompute'
+# PostgreSQL advisory lock key of the rating writes
+RATINGS_LOCK_KEY = 4401
+
+
+def lock_ratings(*, exclusive: bool):
+    """
+    Take the ratings advisory lock until the end of the transaction. Match
+    updates hold it shared and lock their two rows, so only matches sharing a
+    player wait on each other, a full recompute holds it exclusive. Other
+    databases serialize write transactions already.
+    """
+    if connection.vendor != 'postgresql':
+        return
+    function = 'pg_advisory_xact_lock' if exclusive else 'pg_advisory_xact_lock_shared'
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT {function}(%s)', [RATINGS_LOCK_KEY])
+
+
+_deferred_recompute = ContextVar('deferred_recompute', default=None)
+
+
+def request_recompute():
+    """Queue a rating recompute, or note it for the end of the enclosing defer_recompute block."""
+    deferred = _deferred_recompute.get()
+    if deferred is not None:
+        deferred['pending'] = True
+        return None
+    return Job.enqueue(RECOMPUTE_RATINGS_JOB, key='ratings')
+
+
+@contextmanager
+def defer_recompute():
+    """
+    Hold back the recomputes requested by match edits inside the block and
+    queue a single one when it exits. Nested blocks join the outer one.
+    """
+    if _deferred_recompute.get() is not None:
+        yield
+        return
+
+    deferred = {'pending': False}
+    token = _deferred_recompute.set(deferred)
+    try:
+        yield
+    finally:
+        _deferred_recompute.reset(token)
+        # Also after an error: changes committed before it still need the recompute
+        if deferred['pending']:
+            request_recompute()
+
+
 class Match(models.Model):
     """Table for keeping track of game scores and winners."""
     winner = models.ForeignKey(Player, default=None, related_name='won_matches',on_delete=models.CASCADE)
@@ -14,6 +70,9 @@ class Match(models.Model):
     loser = models.ForeignKey(Player, default=None, related_name='lost_matches', on_delete=models.CASCADE)
     losing_score = models.IntegerField(default=None)
     datetime = models.DateTimeField(auto_now_add=True)
+    # Ratings of both players once this match was rated, when it was submitted
+    winner_rating = models.IntegerField(null=True, blank=True)
+    loser_rating = models.IntegerField(null=True, blank=True)
 
     def __str__(self):
         """Display match description as string object representation."""
@@ -48,19 +107,33 @@ class Match(models.Model):
         return description
 
     def save(self, *args, **kwargs):
-        if self.id:  # occurs when the match already exists and is being updated
+        """
+        Save the match and update the ratings of its two players. Editing a
+        saved match changes history, it queues a full recompute for the worker
+        instead (pending recomputes are coalesced into one, see defer_recompute
+        for batches).
+        """
+        from ranker.core.services.data import invalidate_leaderboard
+
+        with transaction.atomic():
+            adding = self._state.adding
+            # Saved first: the insert is the transaction's first write, which
+            # SQLite needs to queue concurrent submitters instead of failing them
             super().save(*args, **kwargs)
-            PlayerRating.generate_ratings()
-        else:  # occurs when it's a new match being added
-            super().save(*args, **kwargs)
-            elo_rating = EloRating(use_current_ratings=True)
-            elo_rating.update_ratings(self.winner, self.loser)
-            PlayerRating.add_ratings(elo_rating)
+            if adding:
+                PlayerRating.apply_match(self)
+            else:
+                request_recompute()
+            transaction.on_commit(invalidate_leaderboard)
 
     class Meta:
         db_table = 'match'
         verbose_name = ('match')
         verbose_name_plural = ('matchs')
+        indexes = [
+            # Rating replays and recent matches walk matches in time order
+            models.Index(fields=['datetime'], name='match_datetime'),
+        ]
 
 
 class Game(models.Model):
@@ -74,23 +147,88 @@ class PlayerRating(models.Model):
     """Table for keeping track of a player's rating."""
     player = models.OneToOneField(Player, default=None, primary_key=True, on_delete=models.CASCADE)
     rating = models.IntegerField(default=None, blank=False)
+    # Matches applied to the rating, one per match of the player in the season
+    matches_rated = models.PositiveIntegerField(default=0)
     # game = models.ManyToOneField(Player, blank=False, default=None, primary_key=True, on_delete=models.CASCADE)
     
     @staticmethod
-    def add_ratings(elo_rating: EloRating):
-        """Add ratings to database given EloRating object."""
-        PlayerRating.objects.all().delete()
-        for player, rating in elo_rating.ratings.items():
-            PlayerRating.objects.create(player=player, rating=rating)
+    def apply_match(match):
+        """
+        Rate a new match: lock the two players' rating rows, update them and
+        store the new ratings on the match. Called by Match.save.
+        """
+        player_ids = sorted({match.winner_id, match.loser_id})
+        with transaction.atomic():
+            lock_ratings(exclusive=False)
+
+            # First match of the season: start from the carried over rating
+            season = Season.current()
+            starting = season.starting_ratings(player_ids, by_id=True) if season is not None else {}
+            PlayerRating.objects.bulk_create(
+                [
+                    PlayerRating(player_id=player_id, rating=starting.get(player_id, DEFAULT_ELO_RATING))
+                    for player_id in player_ids
+                ],
+                ignore_conflicts=True
+            )
+
+            # Locked in player order so two matches of the same pair cannot deadlock
+            ratings = PlayerRating.objects.select_for_update().filter(player_id__in=player_ids).order_by('player_id')
+            ratings = {rating.player_id: rating for rating in ratings}
+            winner, loser = ratings[match.winner_id], ratings[match.loser_id]
+            winner.rating, loser.rating = EloRating().calculate_new_ratings(winner.rating, loser.rating)
+            for rating in (winner, loser):
+                rating.matches_rated += 1
+                rating.save(update_fields=['rating', 'matches_rated'])
+
+            match.winner_rating, match.loser_rating = winner.rating, loser.rating
+            Match.objects.filter(pk=match.pk).update(winner_rating=winner.rating, loser_rating=loser.rating)
+
+    @staticmethod
+    def add_ratings(elo_rating: EloRating, matches_rated: dict = None):
+        """
+        Write the ratings of an EloRating object in place: changed rows are
+        updated and missing ones created, readers never see an empty table.
+        """
+        matches_rated = matches_rated or {}
+        ratings = {player.pk: rating for player, rating in elo_rating.ratings.items()}
+        with transaction.atomic():
+            lock_ratings(exclusive=True)
+            PlayerRating.objects.exclude(player_id__in=ratings).delete()
+
+            current = PlayerRating.objects.select_for_update().in_bulk(list(ratings))
+            changed = []
+            for player_id, row in current.items():
+                rated = matches_rated.get(player_id, 0)
+                if (row.rating, row.matches_rated) != (ratings[player_id], rated):
+                    row.rating, row.matches_rated = ratings[player_id], rated
+                    changed.append(row)
+            PlayerRating.objects.bulk_update(changed, ['rating', 'matches_rated'], batch_size=500)
+            PlayerRating.objects.bulk_create([
+                PlayerRating(player_id=player_id, rating=rating, matches_rated=matches_rated.get(player_id, 0))
+                for player_id, rating in ratings.items() if player_id not in current
+            ])
 
     @staticmethod
     def generate_ratings():
-        """Generate ratings from scratch based on all previous matches."""
-        elo_rating = EloRating()
-        matches = Match.objects.all().order_by('datetime')
-        for match in matches:
-            elo_rating.update_ratings(match.winner, match.loser)
-        PlayerRating.add_ratings(elo_rating)
+        """Generate ratings from the season's starting ratings and its matches."""
+        with transaction.atomic():
+            # Exclusive before reading the matches: no match is rated meanwhile
+            lock_ratings(exclusive=True)
+            elo_rating, matches = Season.current_replay()
+            matches_rated = {}
+            changed = []
+            for match in matches:
+                elo_rating.update_ratings(match.winner, match.loser)
+                for player_id in (match.winner_id, match.loser_id):
+                    matches_rated[player_id] = matches_rated.get(player_id, 0) + 1
+                # Keep the ratings stored on matches in line, deletes repair from them
+                ratings = (elo_rating.get_rating(match.winner), elo_rating.get_rating(match.loser))
+                if (match.winner_rating, match.loser_rating) != ratings:
+                    match.winner_rating, match.loser_rating = ratings
+                    changed.append(match)
+            Match.objects.bulk_update(changed, ['winner_rating', 'loser_rating'], batch_size=500)
+            PlayerRating.add_ratings(elo_rating, matches_rated)
 
     @property
     def games_played(self):
@@ -101,20 +239,20 @@ class PlayerRating(models.Model):
     @property
     def losses(self):
         """Returns the number of losses."""
-        losses = Match.objects.filter(loser=self.player).count()
+        losses = Season.current_matches().filter(loser=self.player).count()
         return losses
 
     @property
     def wins(self):
         """Returns the number of wins."""
-        wins = Match.objects.filter(winner=self.player).count()
+        wins = Season.current_matches().filter(winner=self.player).count()
         return wins
 
     @property
     def points_won(self):
         """Returns the number of points won."""
-        winning_matches = Match.objects.filter(winner=self.player)
-        losing_matches = Match.objects.filter(loser=self.player)
+        winning_matches = Season.current_matches().filter(winner=self.player)
+        losing_matches = Season.current_matches().filter(loser=self.player)
         points_won = (
             winning_matches.aggregate(points=Coalesce(Sum('winning_score'), 0))['points']
             + losing_matches.aggregate(points=Coalesce(Sum('losing_score'), 0))['points']
@@ -124,8 +262,8 @@ class PlayerRating(models.Model):
     @property
     def points_lost(self):
         """Returns the number of points lost."""
-        winning_matches = Match.objects.filter(winner=self.player)
-        losing_matches = Match.objects.filter(loser=self.player)
+        winning_matches = Season.current_matches().filter(winner=self.player)
+        losing_matches = Season.current_matches().filter(loser=self.player)
         points_lost = (
             winning_matches.aggregate(points=Coalesce(Sum('losing_score'), 0))['points']
             + losing_matches.aggregate(points=Coalesce(Sum('winning_score'), 0))['points']
@@ -158,17 +296,17 @@ class PlayerRating(models.Model):
 
     @property
     def max_rating(self):
-        max_rating = self.rating
         date = timezone.now()
 
-        elo_rating = EloRating()
-        matches = Match.objects.all().order_by('datetime')
-        for match in matches:
-            elo_rating.update_ratings(match.winner, match.loser)
-            rating = elo_rating.get_rating(self.player)
+        elo_rating, matches = Season.current_id_replay()
+        # The rating carried into the season counts too
+        max_rating = max(self.rating, elo_rating.get_rating(self.player_id))
+        for winner_id, loser_id, when in matches:
+            elo_rating.update_ratings(winner_id, loser_id)
+            rating = elo_rating.get_rating(self.player_id)
             if (rating > max_rating):
                 max_rating = rating
-                date = match.date
+                date = when.strftime('%m/%d/%Y')
 
         return {'rating': max_rating, 'date': date}
 
@@ -183,21 +321,258 @@ class PlayerRating(models.Model):
         """Returns a history report of your rating."""
         rating_history = []
 
-        elo_rating = EloRating()
-        matches = Match.objects.all().order_by('datetime')
-        for match in matches:
-            elo_rating.update_ratings(match.winner, match.loser)
+        elo_rating, matches = Season.current_id_replay()
+        for winner_id, loser_id, when in matches:
+            elo_rating.update_ratings(winner_id, loser_id)
             for rh_elem in rating_history: # Removes Rating history elements on the same day
-                if rh_elem.date == match.datetime.date():
+                if rh_elem.date == when.date():
                     rating_history.remove(rh_elem)
 
-            rating_history.append(RatingHistory(player=self.player, date=match.datetime.date(), rating=elo_rating.get_rating(self.player)))
+            rating_history.append(RatingHistory(player_id=self.player_id, date=when.date(), rating=elo_rating.get_rating(self.player_id)))
         return rating_history
 
     class Meta:
         db_table = 'player_rating'
         verbose_name = ('player_rating')
         verbose_name_plural = ('player_ratings')
+        indexes = [
+            models.Index(fields=['-rating'], name='player_rating_rating'),
+        ]
+
+
+class RatingConfidence(models.Model):
+    """
+    Bootstrap interval of a player's open season rating, replaced by each run
+    of manage.py rating_confidence. Only players with a match in the season have one.
+    """
+    player = models.OneToOneField(Player, primary_key=True, related_name='rating_confidence', on_delete=models.CASCADE)
+    low = models.IntegerField()
+    high = models.IntegerField()
+    # Share of the replicates between low and high
+    level = models.FloatField()
+    replicates = models.PositiveIntegerField()
+    computed = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'rating_confidence'
+        verbose_name = ('rating confidence')
+        verbose_name_plural = ('rating confidences')
+
+
+class Season(models.Model):
+    """
+    Date bounded rating period. Ratings and stats only replay the matches of
+    the open season, starting from the previous season's frozen standings as
+    chosen by carry_over. Closing a season freezes its standings.
+    """
+    CARRY_OVER_FULL = 'full'
+    CARRY_OVER_SOFT = 'soft'
+    CARRY_OVER_RESET = 'reset'
+    CARRY_OVER_CHOICES = (
+        (CARRY_OVER_FULL, 'Keep ratings'),
+        (CARRY_OVER_SOFT, 'Pull ratings towards the default'),
+        (CARRY_OVER_RESET, 'Start everybody at the default'),
+    )
+
+    name = models.CharField(max_length=60)
+    start = models.DateTimeField()
+    end = models.DateTimeField(null=True, blank=True)
+    carry_over = models.CharField(max_length=5, choices=CARRY_OVER_CHOICES, default=CARRY_OVER_FULL)
+    # Share of the distance from the default rating kept by a soft reset
+    soft_reset_factor = models.FloatField(default=0.5)
+    closed = models.BooleanField(default=False)
+    match_count = models.PositiveIntegerField(default=0)
+    player_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
+
+    @staticmethod
+    def current():
+        """The open season, None before the first season is created."""
+        return Season.objects.filter(closed=False).first()
+
+    @staticmethod
+    def current_matches():
+        """Matches of the open season, every match when there are no seasons."""
+        season = Season.current()
+        return season.matches() if season else Match.objects.all()
+
+    @staticmethod
+    def current_replay():
+        """Seeded EloRating and time ordered matches to replay for the open season."""
+        season = Season.current()
+        if season is None:
+            return EloRating(), Match.objects.select_related('winner', 'loser').order_by('datetime')
+        return season.replay()
+
+    @staticmethod
+    def current_id_replay():
+        """
+        Like current_replay with ratings keyed by player id and matches as
+        (winner_id, loser_id, datetime) rows, no model instance per match.
+        """
+        season = Season.current()
+        matches = season.matches() if season else Match.objects.all()
+        starting = season.starting_ratings(by_id=True) if season else {}
+        return EloRating(starting_ratings=starting), matches.order_by('datetime').values_list('winner_id', 'loser_id', 'datetime')
+
+    def matches(self):
+        matches = Match.objects.filter(datetime__gte=self.start)
+        if self.end is not None:
+            matches = matches.filter(datetime__lt=self.end)
+        return matches
+
+    def previous(self):
+        return Season.objects.filter(closed=True, start__lt=self.start).order_by('-start').first()
+
+    def starting_ratings(self, player_ids=None, by_id=False) -> dict:
+        """
+        Ratings carried over from the previous season's frozen standings, of
+        every player or the given ones, keyed by player or with by_id by player id.
+        """
+        previous = self.previous()
+        if previous is None or self.carry_over == Season.CARRY_OVER_RESET:
+            return {}
+
+        standings = previous.standings.all() if by_id else previous.standings.select_related('player')
+        if player_ids is not None:
+            standings = standings.filter(player_id__in=player_ids)
+        ratings = {}
+        for standing in standings:
+            rating = standing.rating
+            if self.carry_over == Season.CARRY_OVER_SOFT:
+                rating = int(DEFAULT_ELO_RATING + self.soft_reset_factor * (rating - DEFAULT_ELO_RATING))
+            ratings[standing.player_id if by_id else standing.player] = rating
+        return ratings
+
+    def replay(self):
+        elo_rating = EloRating(starting_ratings=self.starting_ratings())
+        return elo_rating, self.matches().select_related('winner', 'loser').order_by('datetime')
+
+    def compute_standings(self) -> list:
+        """Unsaved SeasonStanding rows from a replay of the season."""
+        elo_rating, matches = self.replay()
+        starting = dict(elo_rating.ratings)
+        best = dict(starting)
+        stats = {}
+
+        for match in matches:
+            elo_rating.update_ratings(match.winner, match.loser)
+            for player, won, scored, conceded in (
+                (match.winner, 1, match.winning_score, match.losing_score),
+                (match.loser, 0, match.losing_score, match.winning_score),
+            ):
+                best[player] = max(best.get(player, DEFAULT_ELO_RATING), elo_rating.get_rating(player))
+                player_stats = stats.setdefault(player, [0, 0, 0, 0])
+                player_stats[0] += won
+                player_stats[1] += 1 - won
+                player_stats[2] += scored
+                player_stats[3] += conceded
+
+        ranked = sorted(elo_rating.ratings.items(), key=lambda item: (-item[1], item[0].pk))
+        standings = []
+        for rank, (player, rating) in enumerate(ranked, start=1):
+            wins, losses, points_won, points_lost = stats.get(player, [0, 0, 0, 0])
+            standings.append(SeasonStanding(
+                season=self,
+                player=player,
+                rank=rank,
+                rating=rating,
+                starting_rating=starting.get(player, DEFAULT_ELO_RATING),
+                max_rating=best[player],
+                wins=wins,
+                losses=losses,
+                points_won=points_won,
+                points_lost=points_lost,
+            ))
+        return standings
+
+    def close(self, *, next_name: str, carry_over: str = CARRY_OVER_FULL, soft_reset_factor: float = 0.5, end=None):
+        """
+        Freeze this season's standings and open the next one at its end.
+        Returns the new season, ratings are recomputed by the worker.
+        """
+        with transaction.atomic():
+            season = Season.objects.select_for_update().get(pk=self.pk)
+            if season.closed:
+                raise ValueError(f'{season} is already closed')
+
+            season.end = end or timezone.now()
+            standings = season.compute_standings()
+            SeasonStanding.objects.bulk_create(standings)
+            season.match_count = season.matches().count()
+            season.player_count = sum(1 for standing in standings if standing.games_played)
+            season.closed = True
+            season.save()
+
+            next_season = Season.objects.create(
+                name=next_name,
+                start=season.end,
+                carry_over=carry_over,
+                soft_reset_factor=soft_reset_factor,
+            )
+            request_recompute()
+        return next_season
+
+    class Meta:
+        db_table = 'season'
+        verbose_name = ('season')
+        verbose_name_plural = ('seasons')
+        ordering = ['-start']
+        constraints = [
+            models.UniqueConstraint(fields=['closed'], condition=Q(closed=False), name='season_single_open'),
+        ]
+
+
+class SeasonStanding(models.Model):
+    """Final rating and stats of a player in a closed season."""
+    season = models.ForeignKey(Season, related_name='standings', on_delete=models.CASCADE)
+    player = models.ForeignKey(Player, related_name='season_standings', on_delete=models.CASCADE)
+    rank = models.PositiveIntegerField()
+    rating = models.IntegerField()
+    starting_rating = models.IntegerField()
+    max_rating = models.IntegerField()
+    wins = models.PositiveIntegerField(default=0)
+    losses = models.PositiveIntegerField(default=0)
+    points_won = models.PositiveIntegerField(default=0)
+    points_lost = models.PositiveIntegerField(default=0)
+
+    @property
+    def games_played(self):
+        return self.wins + self.losses
+
+    class Meta:
+        db_table = 'season_standing'
+        verbose_name = ('season standing')
+        verbose_name_plural = ('season standings')
+        constraints = [
+            models.UniqueConstraint(fields=['season', 'player'], name='season_standing_player'),
+        ]
+        indexes = [
+            models.Index(fields=['season', 'rank'], name='season_standing_rank'),
+        ]
+
+
+class RatingSnapshot(models.Model):
+    """
+    Every player's rating after the season's matches up to taken_at, the
+    starting point of point in time replays (see ranker.core.services.snapshots).
+    Snapshots with no season cover the matches played before the first season.
+    """
+    season = models.ForeignKey(Season, null=True, blank=True, related_name='rating_snapshots', on_delete=models.CASCADE)
+    taken_at = models.DateTimeField()
+    match_count = models.PositiveIntegerField()
+    # {player id: rating}
+    ratings = models.JSONField()
+
+    class Meta:
+        db_table = 'rating_snapshot'
+        verbose_name = ('rating snapshot')
+        verbose_name_plural = ('rating snapshots')
+        indexes = [
+            models.Index(fields=['season', 'taken_at'], name='rating_snapshot_taken'),
+        ]
 
 
 class Event(models.Model):
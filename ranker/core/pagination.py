@@ -0,0 +1,63 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.http import StreamingHttpResponse
+from django.utils.functional import cached_property
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 2000
+# Above this many rows the admin shows the planner's estimate instead of counting
+ESTIMATE_COUNT_ABOVE = 100000
+
+
+class NewestFirstCursorPagination(CursorPagination):
+    """
+    Cursor pagination over the primary key, newest rows first. Each page is a
+    single indexed range read no matter how deep the client pages.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = '-id'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that skips COUNT(*) on large unfiltered PostgreSQL tables
+    and uses the planner's row estimate instead. Pages are read ordered by the
+    primary key, an index range read followed by the offset.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where and connections[queryset.db].vendor == 'postgresql':
+            with connections[queryset.db].cursor() as cursor:
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+            if row and row[0] > ESTIMATE_COUNT_ABOVE:
+                return int(row[0])
+        return super().count
+
+
+def stream_requested(request) -> bool:
+    return request.query_params.get('stream', '').lower() in ('1', 'true')
+
+
+def stream_json(queryset, serializer_class):
+    """
+    Stream a queryset as a JSON array, serializing rows as they come off the
+    database cursor so memory stays flat however many rows there are.
+    """
+    encoder = JSONEncoder(separators=(',', ':'))
+
+    def rows():
+        yield '['
+        for i, obj in enumerate(queryset.iterator(chunk_size=STREAM_CHUNK_SIZE)):
+            yield (',' if i else '') + encoder.encode(serializer_class(obj).data)
+        yield ']'
+
+    return StreamingHttpResponse(rows(), content_type='application/json')
@@ -7,8 +7,9 @@ DEFAULT_K_FACTOR = 30
 class EloRating(object):
     """Uses Elo rating system to rate players."""
 
-    def __init__(self, use_current_ratings=False):
-        self.ratings = {}
+    def __init__(self, use_current_ratings=False, starting_ratings=None):
+        # starting_ratings: ratings carried into the replay, e.g. from the previous season
+        self.ratings = dict(starting_ratings or {})
         if use_current_ratings:
             rated_players = ranker.core.models.PlayerRating.objects.all()
             for rated_player in rated_players:
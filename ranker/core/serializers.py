@@ -1,5 +1,25 @@
 from rest_framework import serializers
-from ranker.core.models import Event, Match, RatingHistory
+from ranker.core.models import Event, Match, RatingHistory, Season, SeasonStanding
+
+
+def requested_fields(request):
+    """Field names asked for with ?fields=a,b,c, None when every field is wanted."""
+    fields = request.query_params.get('fields')
+    if not fields:
+        return None
+    return {field.strip() for field in fields.split(',') if field.strip()}
+
+
+class SparseFieldsetMixin(object):
+    """Serializer mixin dropping every field not listed in the `fields` keyword argument."""
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
 
 class EventSerializer(serializers.ModelSerializer):
     
@@ -13,6 +33,26 @@ class MatchSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class MatchSubmitSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Match
+        fields = ['id', 'winner', 'winning_score', 'loser', 'losing_score', 'datetime', 'winner_rating', 'loser_rating']
+        read_only_fields = ['id', 'datetime', 'winner_rating', 'loser_rating']
+        extra_kwargs = {
+            'winner': {'required': True},
+            'winning_score': {'required': True},
+            'loser': {'required': True},
+            'losing_score': {'required': True},
+        }
+
+    def validate(self, data):
+        if data['winner'] == data['loser']:
+            raise serializers.ValidationError('Winner and loser must be different players')
+        if data['winning_score'] <= data['losing_score']:
+            raise serializers.ValidationError('Winning score must be higher than losing score')
+        return data
+
+
 class MatchHistorySerializer(serializers.Serializer):
     id = serializers.IntegerField()
     opponent_name = serializers.CharField(max_length=80)
@@ -28,4 +68,24 @@ class RatingHistorySerializer(serializers.ModelSerializer):
 
     class Meta:
         model = RatingHistory
-        exclude = ['id', 'player']
\ No newline at end of file
+        exclude = ['id', 'player']
+
+class SeasonSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Season
+        fields = [
+            'id', 'name', 'start', 'end', 'carry_over', 'soft_reset_factor',
+            'closed', 'match_count', 'player_count'
+        ]
+
+
+class SeasonStandingSerializer(serializers.ModelSerializer):
+    name = serializers.CharField(source='player.full_name')
+    games_played = serializers.IntegerField()
+
+    class Meta:
+        model = SeasonStanding
+        fields = [
+            'player', 'name', 'rank', 'rating', 'starting_rating', 'max_rating',
+            'wins', 'losses', 'games_played', 'points_won', 'points_lost'
+        ]
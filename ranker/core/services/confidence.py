@@ -0,0 +1,55 @@
+"""
+Rating confidence intervals.
+
+The open season is replayed from bootstrap resamples of its matches (see
+ranker.core.bootstrap) and each player's interval is the central level share
+of their final ratings over the replicates. A player with few matches is
+often drawn a handful of times or not at all, their interval is wide.
+"""
+import numpy as np
+from django.db import transaction
+
+from ranker.core.bootstrap import bootstrap_ratings
+from ranker.core.models import RatingConfidence, Season
+from ranker.core.rankings import DEFAULT_K_FACTOR
+from ranker.core.services import data
+
+CONFIDENCE_LEVEL = 0.95
+CONFIDENCE_REPLICATES = 1000
+
+
+def compute_confidence(*, replicates: int = CONFIDENCE_REPLICATES, level: float = CONFIDENCE_LEVEL,
+                       workers: int = None, seed: int = None) -> list:
+    """Unsaved RatingConfidence of every player with a match in the open season."""
+    elo_rating, matches = Season.current_id_replay()
+    matches = [(winner_id, loser_id) for winner_id, loser_id, _ in matches]
+    if not matches:
+        return []
+
+    played = {player_id for match in matches for player_id in match}
+    player_ids = sorted(played | set(elo_rating.ratings))
+    index = {player_id: i for i, player_id in enumerate(player_ids)}
+    starting = np.array([elo_rating.get_rating(player_id) for player_id in player_ids], dtype=np.float64)
+    winners = np.array([index[winner_id] for winner_id, _ in matches], dtype=np.int32)
+    losers = np.array([index[loser_id] for _, loser_id in matches], dtype=np.int32)
+
+    ratings = bootstrap_ratings(
+        starting, winners, losers, replicates=replicates, k_factor=DEFAULT_K_FACTOR, workers=workers, seed=seed
+    )
+    low, high = np.percentile(ratings, [50 * (1 - level), 50 * (1 + level)], axis=0)
+    return [
+        RatingConfidence(
+            player_id=player_id, low=int(round(low[i])), high=int(round(high[i])), level=level, replicates=replicates
+        )
+        for i, player_id in enumerate(player_ids) if player_id in played
+    ]
+
+
+def update_confidence(**options) -> int:
+    """Replace the stored intervals, returns how many players have one."""
+    confidences = compute_confidence(**options)
+    with transaction.atomic():
+        RatingConfidence.objects.all().delete()
+        RatingConfidence.objects.bulk_create(confidences, batch_size=500)
+        transaction.on_commit(data.invalidate_leaderboard)
+    return len(confidences)
@@ -1,17 +1,23 @@
 import datetime
 
-import pandas as pd
-
+from django.core.cache import caches
 from django.db.models import IntegerField, CharField, F, Value
 from django.db.models.functions import Concat, Cast
 from django.utils import timezone
 from django.utils.translation import gettext as _
 
-from ranker.core.models import Player, Match, PlayerRating
+from ranker.core import identity
+from ranker.core.models import Player, Match, PlayerRating, RatingConfidence, Season
 
 VALUE_WIN = 1
 VALUE_LOSE = 0
 
+LEADERBOARD_PLAYERS = 5
+LEADERBOARD_TREND_DAYS = 7
+LEADERBOARD_CACHE = 'leaderboard'
+LEADERBOARD_CACHE_KEY = 'leaderboard'
+LB_CACHE_MINUTES = 1
+
 def get_last_matches(*, player_id: int, n_matches: int) -> Match:
 
     wins = Match.objects.filter(winner_id=player_id).values(
@@ -41,18 +47,30 @@ def get_last_matches(*, player_id: int, n_matches: int) -> Match:
     return summary
 
 
-def get_player_stats(*, player_id: int) -> dict:
+def get_player_stats(*, player_id: int, fields: set = None) -> dict:
+    """The player's stats, only the ones in fields (all of them for None) are computed."""
+
+    def wanted(*names):
+        return fields is None or any(name in fields for name in names)
 
     stats = {}
 
-    wins = Match.objects.filter(winner_id=player_id)
-    losses = Match.objects.filter(loser_id=player_id)
-    player_rating = PlayerRating.objects.get(pk=player_id)      
+    # Stats of the open season, closed ones are in their frozen standings
+    player_rating = identity.current().get(PlayerRating, player_id)
 
-    stats['win_count'] = wins.count()
-    stats['lose_count'] = losses.count()
-    stats['total_games'] = stats['win_count'] + stats['lose_count']
-    stats['best_rating'] = ( player_rating.max_rating )
+    if wanted('win_count', 'total_games'):
+        stats['win_count'] = Season.current_matches().filter(winner_id=player_id).count()
+    if wanted('lose_count', 'total_games'):
+        stats['lose_count'] = Season.current_matches().filter(loser_id=player_id).count()
+    if wanted('total_games'):
+        stats['total_games'] = stats['win_count'] + stats['lose_count']
+    if wanted('best_rating'):
+        stats['best_rating'] = ( player_rating.max_rating )
+    if wanted('rating_interval'):
+        stats['rating_interval'] = rating_interval(identity.current().get_many(RatingConfidence, [player_id]).get(player_id))
+
+    if fields is not None:
+        stats = {name: value for name, value in stats.items() if name in fields}
 
     # TODO: best/worst opponent, events frequency,
     # achievemets (medal places) and more
@@ -114,7 +132,13 @@ def get_leaders(*, n_players: int = 5, rating_trend_days: int = 7) -> list:
     TODO: put this to ORM level (PostgreSQL Window Functions)
     """
     # leaders = Player.objects.order_by('-rating')[:n_players]
-    leaders = PlayerRating.objects.all().order_by('-rating')[:n_players]
+    leaders = list(PlayerRating.objects.all().order_by('-rating')[:n_players])
+    identity_map = identity.current()
+    identity_map.add(*leaders)
+    leader_ids = [leader.player_id for leader in leaders]
+    players = identity_map.get_many(Player, leader_ids)
+    trends = get_rating_trends(leader_ids)
+    confidences = identity_map.get_many(RatingConfidence, leader_ids)
 
     result = []
 
@@ -122,10 +146,11 @@ def get_leaders(*, n_players: int = 5, rating_trend_days: int = 7) -> list:
     for leader in leaders:
 
         leader_dict = {
-            'id': leader.player.id,
-            'name': leader.player.full_name,
+            'id': leader.player_id,
+            'name': players[leader.player_id].full_name,
             'rating': leader.rating,
-            'rating_trend': leader.rating_trend
+            'rating_trend': trends[leader.player_id],
+            'rating_interval': rating_interval(confidences.get(leader.player_id))
         }
 
         result.append(leader_dict)
@@ -133,12 +158,68 @@ def get_leaders(*, n_players: int = 5, rating_trend_days: int = 7) -> list:
     return result
 
 
+def rating_interval(confidence) -> dict:
+    """Bootstrap interval of a rating, None until manage.py rating_confidence covered the player."""
+    if confidence is None:
+        return None
+    return {'low': confidence.low, 'high': confidence.high, 'level': confidence.level}
+
+
+def get_rating_trends(player_ids: list, n_days: int = 5) -> dict:
+    """
+    Ratings of the players at the end of each of the last n_days match days,
+    what PlayerRating.rating_trend gives for one player, from a single replay.
+    """
+    elo_rating, matches = Season.current_id_replay()
+    snapshots = []
+    day = None
+    for winner_id, loser_id, when in matches:
+        if day is not None and when.date() != day:
+            snapshots.append([elo_rating.get_rating(player_id) for player_id in player_ids])
+        day = when.date()
+        elo_rating.update_ratings(winner_id, loser_id)
+    if day is not None:
+        snapshots.append([elo_rating.get_rating(player_id) for player_id in player_ids])
+
+    recent = snapshots[-n_days:]
+    return {player_id: [snapshot[i] for snapshot in recent] for i, player_id in enumerate(player_ids)}
+
+
+def get_cached_leaderboard() -> dict:
+    return caches[LEADERBOARD_CACHE].get(LEADERBOARD_CACHE_KEY)
+
+
+def cache_leaderboard(board: dict):
+    caches[LEADERBOARD_CACHE].set(LEADERBOARD_CACHE_KEY, board, LB_CACHE_MINUTES * 60)
+
+
+def invalidate_leaderboard():
+    caches[LEADERBOARD_CACHE].delete(LEADERBOARD_CACHE_KEY)
+
+
+def get_leaderboard(*, refresh: bool = False) -> dict:
+    """Leaders, records and totals, cached for LB_CACHE_MINUTES minutes."""
+    board = None if refresh else get_cached_leaderboard()
+    if board is None:
+        board = {
+            'leaders': get_leaders(n_players=LEADERBOARD_PLAYERS, rating_trend_days=LEADERBOARD_TREND_DAYS),
+            'weekly': [],
+            'maxes': get_maxes(),
+            'totals': get_totals(),
+        }
+        cache_leaderboard(board)
+    return board
+
+
 def get_maxes() -> dict:
 
-    if not Match.objects.exists():
+    season_matches = Season.current_matches()
+    if not season_matches.exists():
         return dict()
 
-    matches = pd.DataFrame(Match.objects.values('winner_id', 'loser_id'))
+    import pandas as pd  # heavy, only imported once a view needs it
+
+    matches = pd.DataFrame(season_matches.values('winner_id', 'loser_id'))
     ratings = pd.DataFrame(PlayerRating.objects.values('player_id', 'rating'))
 
     wins = matches.groupby('winner_id').size()
@@ -153,13 +234,16 @@ def get_maxes() -> dict:
     ]
 
     result = {}
+    # Plain python numbers, the result is cached and must not need numpy to unpickle
+    best = {metric: int(data.idxmax()) for metric, data in metrics}
+    players = identity.current().get_many(Player, set(best.values()))
 
     for metric, data in metrics:
-        idx = data.idxmax()
+        idx = best[metric]
         result[metric] = [{
             'id': idx,
-            'name': Player.objects.get(pk=idx).full_name,
-            'value': data[idx]
+            'name': players[idx].full_name,
+            'value': data[idx].item()
         }]
         
     return result
@@ -179,6 +263,7 @@ def get_totals() -> list:
 
 
 def get_event_details(*, event_id: int, days: int = 365, n_events: int = 5) -> dict:
+    import pandas as pd
 
     all_matches = (
         Match.objects
@@ -0,0 +1,97 @@
+"""
+Home page sections, served together by the home endpoint.
+
+Each section is cached on its own (sections with their own cache, like
+today's board, are read through it) and the sections missing from the cache
+are computed concurrently on a thread pool. Only the sections HomeView.vue
+renders are listed, the leaderboard has its own endpoint.
+"""
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import close_old_connections
+
+from ranker.core.services import data
+from ranker.wordle.services import boards, leaders
+
+logger = logging.getLogger(__name__)
+
+HOME_CACHE = data.LEADERBOARD_CACHE
+
+# name: (function, seconds cached here, None when the function caches itself)
+SECTIONS = {
+    'wordle_today': (boards.get_today_board, None),
+    'wordle_stats': (leaders.wordle_stats, 60),
+    'wordle_shame': (leaders.wall_of_shame, 60),
+    'wordle_leaders_guesses': (lambda: leaders.top_players('avg_guesses'), 5 * 60),
+    'wordle_leaders_time': (lambda: leaders.top_players('avg_time'), 5 * 60),
+}
+
+_executor = None
+
+
+def executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'HOME_SECTION_WORKERS', 4), thread_name_prefix='home-section'
+        )
+    return _executor
+
+
+def section_key(name: str) -> str:
+    return f'home:{name}'
+
+
+def _compute(name: str):
+    try:
+        return SECTIONS[name][0]()
+    finally:
+        # Pool threads outlive the request, release their connection
+        close_old_connections()
+
+
+def get_sections(names=None) -> tuple:
+    """
+    The given sections (all by default) and the names of those that failed.
+    Raises KeyError for an unknown section.
+    """
+    names = list(SECTIONS if names is None else names)
+    for name in names:
+        if name not in SECTIONS:
+            raise KeyError(name)
+
+    cached = [name for name in names if SECTIONS[name][1] is not None]
+    sections = {}
+    if cached:
+        found = caches[HOME_CACHE].get_many([section_key(name) for name in cached])
+        sections = {name: found[section_key(name)] for name in cached if section_key(name) in found}
+
+    missing = [name for name in names if name not in sections]
+    # The first missing section is computed in this thread while the pool works
+    # on the others, each in a copy of the request context (replica routing)
+    futures = {
+        name: executor().submit(contextvars.copy_context().run, _compute, name)
+        for name in missing[1:]
+    }
+    errors = []
+    for name in missing:
+        function, seconds = SECTIONS[name]
+        try:
+            value = futures[name].result() if name in futures else function()
+        except Exception:
+            logger.exception('Home section %s failed', name)
+            errors.append(name)
+            continue
+        sections[name] = value
+        if seconds is not None:
+            caches[HOME_CACHE].set(section_key(name), value, seconds)
+
+    return {name: sections[name] for name in names if name in sections}, errors
+
+
+def invalidate(*names):
+    caches[HOME_CACHE].delete_many([section_key(name) for name in names])
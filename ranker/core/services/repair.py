@@ -0,0 +1,161 @@
+"""
+Rating repair after matches are deleted.
+
+Every match stores the ratings of its two players after it was rated. A
+repair starts from the earliest deleted match: the players of the deleted
+matches are replayed forward from their last stored rating before it, and an
+opponent only joins the replay when its stored rating after a match turns
+out different. Everyone else's matches are read, not recomputed.
+
+Deletes of one transaction (a queryset delete, a cascade from a deleted
+player) are collected into a single job, and jobs still queued merge.
+"""
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.dateparse import parse_datetime
+
+from ranker.core.models import Match, PlayerRating, Season, lock_ratings
+from ranker.core.rankings import DEFAULT_ELO_RATING, EloRating
+from ranker.jobs.models import Job
+
+REPAIR_RATINGS_JOB = 'ratings.repair'
+
+_repair_batch = ContextVar('repair_batch', default=None)
+
+
+class MissingRatings(Exception):
+    """A match the repair depends on was never rated (saved before ratings were stored)."""
+
+
+def merge_payloads(queued: dict, payload: dict) -> dict:
+    return {
+        'since': min(queued['since'], payload['since']),
+        'players': sorted(set(queued['players']) | set(payload['players'])),
+    }
+
+
+class RepairBatch(object):
+    """Deleted matches of one transaction, queued as one repair when it commits."""
+
+    def __init__(self, using: str):
+        self.using = using
+        self.since = None
+        self.players = set()
+        self.enqueued = False
+
+    def add(self, match):
+        self.since = match.datetime if self.since is None else min(self.since, match.datetime)
+        self.players.update((match.winner_id, match.loser_id))
+
+    def enqueue(self):
+        if self.enqueued:
+            return
+        self.enqueued = True
+        Job.enqueue(
+            REPAIR_RATINGS_JOB,
+            {'since': self.since.isoformat(), 'players': sorted(self.players)},
+            key='ratings',
+            merge=merge_payloads
+        )
+
+
+def schedule_repair(match, using: str):
+    """Add a deleted match to the repair batch of the current transaction."""
+    batch = _repair_batch.get()
+    if batch is None or batch.enqueued or batch.using != using:
+        batch = RepairBatch(using)
+        _repair_batch.set(batch)
+    batch.add(match)
+    # Registered for every delete: a savepoint rolled back only drops its own
+    # callbacks, the first one left queues the batch and the others find it
+    # queued. Deletes after a full rollback join its batch, the repair then
+    # only replays more players than needed
+    transaction.on_commit(batch.enqueue, using=using)
+
+
+def repair_ratings(*, since: str, players: list):
+    """Replay the open season from since for the given players, full recompute when stored ratings are missing."""
+    with transaction.atomic():
+        lock_ratings(exclusive=True)
+        try:
+            _repair(parse_datetime(since), set(players))
+        except MissingRatings:
+            PlayerRating.generate_ratings()
+
+
+def _repair(since, players: set):
+    season = Season.current()
+    season_matches = Season.current_matches()
+    if season is not None and since < season.start:
+        since = season.start
+
+    def starting_ratings(player_ids) -> dict:
+        if season is None:
+            return {}
+        return season.starting_ratings(player_ids, by_id=True)
+
+    starting = starting_ratings(players)
+
+    def rating_before(player_id):
+        """Stored rating of the player after their last match before since."""
+        last = (
+            season_matches.filter(Q(winner_id=player_id) | Q(loser_id=player_id), datetime__lt=since)
+            .order_by('-datetime').values('winner_id', 'winner_rating', 'loser_rating').first()
+        )
+        if last is None:
+            if player_id not in players:
+                starting.update(starting_ratings([player_id]))
+            return starting.get(player_id, DEFAULT_ELO_RATING)
+        rating = last['winner_rating'] if last['winner_id'] == player_id else last['loser_rating']
+        if rating is None:
+            raise MissingRatings()
+        return rating
+
+    elo_rating = EloRating()
+    affected = set(players)
+    current = {}
+    changed = []
+    matches = (
+        season_matches.filter(datetime__gte=since).order_by('datetime')
+        .values_list('id', 'winner_id', 'loser_id', 'winner_rating', 'loser_rating')
+    )
+    for match_id, winner_id, loser_id, winner_rating, loser_rating in matches.iterator():
+        if winner_rating is None or loser_rating is None:
+            raise MissingRatings()
+        if winner_id in affected or loser_id in affected:
+            for player_id in (winner_id, loser_id):
+                if player_id not in current:
+                    current[player_id] = rating_before(player_id)
+            ratings = elo_rating.calculate_new_ratings(current[winner_id], current[loser_id])
+            if ratings != (winner_rating, loser_rating):
+                changed.append(Match(id=match_id, winner_rating=ratings[0], loser_rating=ratings[1]))
+                # The opponent's rating moved too, their later matches need replaying
+                if ratings[0] != winner_rating:
+                    affected.add(winner_id)
+                if ratings[1] != loser_rating:
+                    affected.add(loser_id)
+            current[winner_id], current[loser_id] = ratings
+        else:
+            current[winner_id], current[loser_id] = winner_rating, loser_rating
+
+    Match.objects.bulk_update(changed, ['winner_rating', 'loser_rating'], batch_size=500)
+
+    rated = {player_id: 0 for player_id in players}
+    for field in ('winner_id', 'loser_id'):
+        counts = season_matches.filter(**{f'{field}__in': players}).values(field).annotate(n=Count('id'))
+        for row in counts:
+            rated[row[field]] += row['n']
+
+    rows = PlayerRating.objects.select_for_update().in_bulk(list(affected))
+    updated = []
+    for player_id, row in rows.items():
+        if player_id in players and not rated[player_id] and player_id not in starting:
+            # No match left and nothing carried over, like a full replay would leave them
+            row.delete()
+            continue
+        row.rating = current[player_id] if player_id in current else rating_before(player_id)
+        row.matches_rated = rated.get(player_id, row.matches_rated)
+        updated.append(row)
+    PlayerRating.objects.bulk_update(updated, ['rating', 'matches_rated'])
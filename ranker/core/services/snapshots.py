@@ -0,0 +1,161 @@
+"""
+Point in time ratings.
+
+A RatingSnapshot holds every player's rating after a season's matches up to
+its taken_at, one is taken at the end of each match day and every
+RATING_SNAPSHOT_MATCHES matches. The ratings as of a date start from the
+latest snapshot before it (an index lookup on season and taken_at) and only
+replay the matches between the two.
+
+Snapshots are appended by manage.py snapshot_ratings and by the job the
+recompute and repair jobs queue after dropping the snapshots they invalidate.
+"""
+import datetime
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ranker.core import identity
+from ranker.core.models import Match, Player, RatingSnapshot, Season, lock_ratings
+from ranker.core.rankings import EloRating
+from ranker.jobs.models import Job
+
+SNAPSHOT_RATINGS_JOB = 'ratings.snapshots'
+# Matches saved but not yet committed can carry an earlier datetime than
+# committed ones, snapshots stay this far behind the latest matches
+SNAPSHOT_SETTLE = datetime.timedelta(minutes=5)
+AS_OF_ERROR = {'as_of': 'Expected a date (end of that day) or a datetime'}
+
+
+def parse_as_of(value: str) -> datetime.datetime:
+    """
+    The moment an as_of query parameter stands for: a datetime, or a date
+    for the end of that day. Raises ValueError.
+    """
+    # Date first, parse_datetime also takes a date (as midnight)
+    date = parse_date(value)
+    if date is not None:
+        when = datetime.datetime.combine(date, datetime.time.max)
+    else:
+        when = parse_datetime(value)
+        if when is None:
+            raise ValueError(f'{value} is not a date or datetime')
+    if settings.USE_TZ and timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    elif not settings.USE_TZ and timezone.is_aware(when):
+        when = timezone.make_naive(when)
+    return when
+
+
+def season_at(when):
+    """The season a moment falls in, None before the first season."""
+    return Season.objects.filter(start__lte=when).order_by('-start').first()
+
+
+def _era(season) -> tuple:
+    """Matches and snapshots of a season, of the time before the first season for None."""
+    snapshots = RatingSnapshot.objects.filter(season=season)
+    if season is not None:
+        return season.matches(), snapshots
+    first_start = Season.objects.order_by('start').values_list('start', flat=True).first()
+    if first_start is None:
+        return Match.objects.all(), snapshots
+    return Match.objects.filter(datetime__lt=first_start), snapshots.filter(taken_at__lt=first_start)
+
+
+def _start(season, snapshot) -> dict:
+    if snapshot is not None:
+        return {int(player_id): rating for player_id, rating in snapshot.ratings.items()}
+    return season.starting_ratings(by_id=True) if season is not None else {}
+
+
+def ratings_as_of(when) -> tuple:
+    """The season of when and the ratings by player id after its matches up to when."""
+    season = season_at(when)
+    matches, snapshots = _era(season)
+    snapshot = snapshots.filter(taken_at__lte=when).order_by('-taken_at').first()
+    if snapshot is not None:
+        matches = matches.filter(datetime__gt=snapshot.taken_at)
+
+    elo_rating = EloRating(starting_ratings=_start(season, snapshot))
+    for winner_id, loser_id in matches.filter(datetime__lte=when).order_by('datetime').values_list('winner_id', 'loser_id'):
+        elo_rating.update_ratings(winner_id, loser_id)
+    return season, elo_rating.ratings
+
+
+def leaderboard_as_of(when, n_players: int) -> dict:
+    """The best n_players as they stood at when."""
+    season, ratings = ratings_as_of(when)
+    ranked = sorted(ratings.items(), key=lambda item: (-item[1], item[0]))[:n_players]
+    players = identity.current().get_many(Player, [player_id for player_id, _ in ranked])
+    return {
+        'as_of': when,
+        'season': season.pk if season is not None else None,
+        'leaders': [
+            {'id': player_id, 'name': players[player_id].full_name, 'rating': rating, 'rank': rank}
+            for rank, (player_id, rating) in enumerate(ranked, start=1)
+            if player_id in players
+        ],
+    }
+
+
+def build_snapshots(season) -> int:
+    """Append the snapshots missing after the latest one of the season, returns how many."""
+    every = getattr(settings, 'RATING_SNAPSHOT_MATCHES', 500)
+    settled = timezone.now() - SNAPSHOT_SETTLE
+
+    with transaction.atomic():
+        # Shared: the recompute and repair jobs drop snapshots under the exclusive lock
+        lock_ratings(exclusive=False)
+        matches, snapshots = _era(season)
+        latest = snapshots.order_by('-taken_at').first()
+        if latest is not None:
+            matches = matches.filter(datetime__gt=latest.taken_at)
+        match_count = latest.match_count if latest is not None else 0
+        elo_rating = EloRating(starting_ratings=_start(season, latest))
+
+        def snapshot(taken_at):
+            return RatingSnapshot(
+                season=season, taken_at=taken_at, match_count=match_count, ratings=dict(elo_rating.ratings)
+            )
+
+        created = []
+        pending = 0
+        last = None
+        matches = matches.filter(datetime__lt=settled).order_by('datetime').values_list('winner_id', 'loser_id', 'datetime')
+        for winner_id, loser_id, when in matches.iterator():
+            # Only between two distinct datetimes, a snapshot covers every match of its taken_at
+            if last is not None and when != last and (pending >= every or when.date() != last.date()):
+                created.append(snapshot(last))
+                pending = 0
+            elo_rating.update_ratings(winner_id, loser_id)
+            match_count += 1
+            pending += 1
+            last = when
+        # The last match day is over once nothing newer can settle into it
+        if last is not None and (pending >= every or last.date() < settled.date()):
+            created.append(snapshot(last))
+
+        RatingSnapshot.objects.bulk_create(created, batch_size=100)
+    return len(created)
+
+
+def build_all_snapshots() -> int:
+    """Bring the snapshots of every season up to date, returns how many were taken."""
+    return sum(build_snapshots(season) for season in [None, *Season.objects.order_by('start')])
+
+
+def drop_snapshots(season, since=None) -> int:
+    """Drop the season's snapshots (from since on) after its matches changed, and queue their rebuild."""
+    _, snapshots = _era(season)
+    if since is not None:
+        snapshots = snapshots.filter(taken_at__gte=since)
+    dropped, _ = snapshots.delete()
+    request_snapshots()
+    return dropped
+
+
+def request_snapshots():
+    return Job.enqueue(SNAPSHOT_RATINGS_JOB, key='snapshots')
@@ -0,0 +1,37 @@
+"""
+Start-up work for app servers: read-only data loaded once in the gunicorn
+master (shared copy-on-write by the forked workers) and the shared board
+caches filled before the first request needs them.
+"""
+import logging
+
+from ranker.core.services import data
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """Load the word indexes and index.html and map the feedback matrix in the current process."""
+    from django.http import Http404
+    from ranker.views import load_index
+    from ranker.wordle.services import analysis, words
+
+    try:
+        load_index()
+    except Http404:
+        logger.warning('Frontend not built, index.html will not be served')
+
+    words.dictionary()
+    words.target_words()
+    try:
+        analysis.feedback_matrix()
+    except analysis.FeedbackMatrixUnavailable:
+        logger.warning('Feedback matrix not built, wordle analysis will be unavailable')
+
+
+def warm_caches(*, refresh: bool = False):
+    """Fill the leaderboard and today's wordle board, recomputing them when refresh is set."""
+    from ranker.wordle.services import boards
+
+    data.get_leaderboard(refresh=refresh)
+    boards.get_today_board(refresh=refresh)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from ranker.core.models import Match
+from ranker.core.services.repair import schedule_repair
+
+
+@receiver(post_delete, sender=Match)
+def repair_ratings_after_delete(sender, instance, using, **kwargs):
+    """Deleted matches are repaired in one batch per transaction, see services.repair."""
+    schedule_repair(instance, using)
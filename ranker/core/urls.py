@@ -1,7 +1,12 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
 from ranker.core import views
+from ranker.core.async_views import read_view
 
 urlpatterns = [
-    path('players/leaderboard', views.LeaderBoard.as_view()),
+    path('home', views.Home.as_view()),
+    path('matches', views.MatchCreate.as_view()),
+    path('players/leaderboard', read_view(views.LeaderBoard, views.AsyncLeaderBoard)),
+    path('seasons', views.SeasonList.as_view()),
+    path('season/<int:season_id>/standings', views.SeasonStandings.as_view()),
 ]
\ No newline at end of file
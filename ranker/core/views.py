@@ -1,7 +1,10 @@
+import asyncio
+
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 
 from rest_framework.authentication import SessionAuthentication
+from ranker.users.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.views import APIView
@@ -9,46 +12,151 @@ from rest_framework.response import Response
 from rest_framework import status
 
 from ranker.core.models import (
-    Event
+    Event, Season
 )
 
 from ranker.core.serializers import (
     EventSerializer,
+    MatchSubmitSerializer,
+    SeasonSerializer,
+    SeasonStandingSerializer,
 )
 
-from ranker.core.services import data
+from ranker.core.services import data, home, snapshots
+from ranker.core.async_views import AsyncAPIView, APIJsonResponse, run_query
 
 N_LAST_MATCHES = 10
-N_PLAYERS = 5
-N_DAYS_STATS_MAIN = 7
-LB_CACHE_MINUTES = 1
 
 class LeaderBoard(APIView):
     """
-    Get data for leaderboard. Data is cached for LB_CACHE_MINUTES
-    minutes. Set it to 0 if you dont need any caching
+    Get data for leaderboard. Data is cached for data.LB_CACHE_MINUTES
+    minutes and dropped whenever ratings are recomputed. ?as_of=<date or
+    datetime> gives the leaders as they stood then instead
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            try:
+                when = snapshots.parse_as_of(as_of)
+            except ValueError:
+                return Response(snapshots.AS_OF_ERROR, status=status.HTTP_400_BAD_REQUEST)
+            return Response(snapshots.leaderboard_as_of(when, data.LEADERBOARD_PLAYERS))
+        return Response(data.get_leaderboard())
+
+
+class AsyncLeaderBoard(AsyncAPIView):
+    """
+    LeaderBoard for the ASGI application, the three parts are queried concurrently
+    """
+
+    async def get(self, request):
+        as_of = request.query_params.get('as_of')
+        if as_of:
+            try:
+                when = snapshots.parse_as_of(as_of)
+            except ValueError:
+                return APIJsonResponse(snapshots.AS_OF_ERROR, status=status.HTTP_400_BAD_REQUEST)
+            return APIJsonResponse(await run_query(snapshots.leaderboard_as_of, when, data.LEADERBOARD_PLAYERS))
+
+        board = await run_query(data.get_cached_leaderboard)
+        if board is None:
+            leaders, maxes, totals = await asyncio.gather(
+                run_query(data.get_leaders, n_players=data.LEADERBOARD_PLAYERS, rating_trend_days=data.LEADERBOARD_TREND_DAYS),
+                run_query(data.get_maxes),
+                run_query(data.get_totals),
+            )
+            board = {
+                'leaders': leaders,
+                'weekly': [],
+                'maxes': maxes,
+                'totals': totals
+            }
+            await run_query(data.cache_leaderboard, board)
+
+        return APIJsonResponse(board)
+
+
+class Home(APIView):
+    """
+    Every home page section in one response, or only those listed in
+    ?sections=a,b to refresh them. Sections that failed are listed in errors.
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
-    # @method_decorator(cache_page(LB_CACHE_MINUTES * 60, cache='leaderboard', key_prefix=''))
     def get(self, request):
-        leaders = data.get_leaders(n_players=N_PLAYERS, rating_trend_days=N_DAYS_STATS_MAIN)
-        # changes = data.get_changes_in_time(n_players=N_PLAYERS, n_days=N_DAYS_STATS_MAIN)
-        maxes = data.get_maxes()
-        totals = data.get_totals()
+        names = request.query_params.get('sections')
+        if names:
+            names = [name.strip() for name in names.split(',') if name.strip()]
+        try:
+            sections, errors = home.get_sections(names or None)
+        except KeyError as error:
+            return Response(
+                {'detail': f'Unknown section {error.args[0]}, expected one of {", ".join(home.SECTIONS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response({'sections': sections, 'errors': errors})
+
 
+class MatchCreate(APIView):
+    """
+    Submit a match result. The two players' ratings are updated with it and
+    returned as winner_rating and loser_rating
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = MatchSubmitSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class SeasonList(APIView):
+    """
+    All seasons, newest first
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        serializer = SeasonSerializer(Season.objects.all(), many=True)
+        return Response(serializer.data)
+
+
+class SeasonStandings(APIView):
+    """
+    Frozen final standings of a closed season, the open season is served
+    by players/leaderboard
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, season_id):
+        try:
+            season = Season.objects.get(pk=season_id)
+        except Season.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        if not season.closed:
+            return Response({'detail': 'Season is still open'}, status=status.HTTP_404_NOT_FOUND)
+
+        standings = season.standings.select_related('player').order_by('rank')
         return Response({
-            'leaders': leaders,
-            'weekly': [],
-            'maxes': maxes,
-            'totals': totals
+            'season': SeasonSerializer(season).data,
+            'standings': SeasonStandingSerializer(standings, many=True).data,
         })
+
+
 class EventList(APIView):
     """
     List of all events
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
@@ -61,7 +169,7 @@ class EventDetail(APIView):
     """
     Detailed event information
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, response, event_id):
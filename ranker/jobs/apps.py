@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+class JobsConfig(AppConfig):
+    name = 'ranker.jobs'
+
+    def ready(self):
+        from ranker.jobs.registry import autodiscover
+        autodiscover()
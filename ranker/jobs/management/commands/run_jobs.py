@@ -0,0 +1,57 @@
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from ranker.jobs.models import Job
+from ranker.jobs.registry import PERIODIC
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run queued background jobs, polling the queue until stopped, and the periodic tasks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=1.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument(
+            '--stale-after', type=int, default=15 * 60,
+            help='Requeue jobs left running this many seconds by a worker that died'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+
+    def handle(self, *args, **options):
+        requeued = Job.requeue_stale(options['stale_after'])
+        if requeued:
+            self.stdout.write(f'Requeued {requeued} stale jobs')
+
+        last_runs = {}
+        try:
+            while True:
+                close_old_connections()
+                self.run_periodic(last_runs)
+                job = Job.claim()
+                if job is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['interval'])
+                    continue
+
+                started = time.monotonic()
+                job.run()
+                self.stdout.write(f'{job} in {time.monotonic() - started:.2f}s{": " + job.error if job.error else ""}')
+        except KeyboardInterrupt:
+            pass
+
+    def run_periodic(self, last_runs: dict):
+        """Run the periodic tasks that are due, a failing one is logged and retried on schedule."""
+        now = time.monotonic()
+        for name, (func, seconds) in PERIODIC.items():
+            if name in last_runs and now - last_runs[name] < seconds:
+                continue
+            last_runs[name] = now
+            try:
+                func()
+            except Exception:
+                logger.exception('Periodic task %s failed', name)
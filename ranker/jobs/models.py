@@ -0,0 +1,126 @@
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ranker.jobs.registry import get_handler
+
+
+class Job(models.Model):
+    """
+    Background job stored in the database and run by ``manage.py run_jobs``.
+
+    Jobs enqueued with the same key while one is still queued are coalesced
+    into it, so a burst of match submissions leads to a single recompute.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=200, blank=True, default='')
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True, default='')
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f'{self.name} #{self.id} ({self.status})'
+
+    @staticmethod
+    def enqueue(name: str, payload: dict = None, key: str = '', merge=None):
+        """
+        Queue a job, or return the queued job with the same key if there is
+        one. merge(queued_payload, payload) combines the payload into it.
+        """
+        if key:
+            with transaction.atomic():
+                queued = Job.objects.filter(name=name, key=key, status=Job.QUEUED)
+                if merge is not None:
+                    # Locked so a worker cannot claim it with half merged payload
+                    queued = queued.select_for_update()
+                queued = queued.first()
+                if queued is not None:
+                    if merge is not None:
+                        queued.payload = merge(queued.payload, payload or {})
+                        queued.save(update_fields=['payload'])
+                    return queued
+
+        try:
+            with transaction.atomic():
+                job = Job.objects.create(name=name, key=key, payload=payload or {})
+        except IntegrityError:
+            # Another request queued the same key in the meantime
+            return Job.enqueue(name, payload, key, merge)
+
+        if getattr(settings, 'JOBS_EAGER', False):
+            transaction.on_commit(job.run)
+        return job
+
+    @staticmethod
+    def claim():
+        """Mark the oldest queued job as running and return it, None when the queue is empty."""
+        while True:
+            job_id = Job.objects.filter(status=Job.QUEUED).order_by('id').values_list('id', flat=True).first()
+            if job_id is None:
+                return None
+            # Conditional update: only one worker can move the job out of queued
+            claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+                status=Job.RUNNING, started=timezone.now(), attempts=F('attempts') + 1
+            )
+            if claimed:
+                return Job.objects.get(pk=job_id)
+
+    @staticmethod
+    def requeue_stale(timeout: int) -> int:
+        """Put back jobs left running for more than timeout seconds by a dead worker."""
+        stale = Job.objects.filter(status=Job.RUNNING, started__lt=timezone.now() - timezone.timedelta(seconds=timeout))
+        # Keep the coalescing constraint: skip keys that were queued again since
+        requeued = 0
+        for job in stale:
+            if job.key and Job.objects.filter(name=job.name, key=job.key, status=Job.QUEUED).exists():
+                Job.objects.filter(pk=job.pk).update(status=Job.FAILED, error='Worker lost', finished=timezone.now())
+            else:
+                requeued += Job.objects.filter(pk=job.pk, status=Job.RUNNING).update(status=Job.QUEUED)
+        return requeued
+
+    def run(self):
+        """Run the job handler and record the outcome."""
+        Job.objects.filter(pk=self.pk, status=Job.QUEUED).update(status=Job.RUNNING, started=timezone.now())
+        # Payloads merged in after this instance was loaded
+        self.refresh_from_db(fields=['payload'])
+        try:
+            with transaction.atomic():
+                get_handler(self.name)(**self.payload)
+        except Exception as error:
+            self.status = Job.FAILED
+            self.error = f'{type(error).__name__}: {error}'
+        else:
+            self.status = Job.DONE
+        self.finished = timezone.now()
+        Job.objects.filter(pk=self.pk).update(status=self.status, error=self.error, finished=self.finished)
+
+    class Meta:
+        db_table = 'job'
+        verbose_name = ('job')
+        verbose_name_plural = ('jobs')
+        indexes = [
+            models.Index(fields=['status', 'id'], name='job_status_id'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['name', 'key'],
+                condition=Q(status='queued') & ~Q(key=''),
+                name='job_queued_key_unique',
+            ),
+        ]
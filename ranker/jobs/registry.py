@@ -0,0 +1,43 @@
+"""
+Job handlers by name. Apps register theirs in a ``jobs`` module, which is
+imported when the jobs app is ready:
+
+    @handler('ratings.recompute')
+    def recompute_ratings():
+        ...
+
+Functions registered with ``periodic`` are run by the run_jobs worker every
+so many seconds, between jobs.
+"""
+from django.utils.module_loading import autodiscover_modules
+
+HANDLERS = {}
+# name: (function, seconds between runs)
+PERIODIC = {}
+
+
+def handler(name: str):
+    """Register the decorated function as the handler of jobs called name."""
+    def register(func):
+        HANDLERS[name] = func
+        return func
+    return register
+
+
+def periodic(seconds: float):
+    """Register the decorated function to run every seconds in the run_jobs worker."""
+    def register(func):
+        PERIODIC[f'{func.__module__}.{func.__name__}'] = (func, seconds)
+        return func
+    return register
+
+
+def get_handler(name: str):
+    try:
+        return HANDLERS[name]
+    except KeyError:
+        raise LookupError(f'No handler registered for job {name}')
+
+
+def autodiscover():
+    autodiscover_modules('jobs')
@@ -0,0 +1,9 @@
+from rest_framework import serializers
+
+from ranker.jobs.models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Job
+        fields = ['id', 'name', 'status', 'attempts', 'error', 'created', 'started', 'finished']
@@ -0,0 +1,6 @@
+from django.urls import path
+from ranker.jobs import views
+
+urlpatterns = [
+    path('job/<int:job_id>', views.JobDetail.as_view()),
+]
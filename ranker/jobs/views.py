@@ -0,0 +1,25 @@
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.permissions import IsAuthenticated
+
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+
+from ranker.jobs.models import Job
+from ranker.jobs.serializers import JobSerializer
+from ranker.users.authentication import CachedTokenAuthentication
+
+
+class JobDetail(APIView):
+    """
+    Status of a background job, e.g. the rating recompute of a submitted match
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, job_id):
+        try:
+            job = Job.objects.get(pk=job_id)
+        except Job.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(JobSerializer(job).data)
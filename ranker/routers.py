@@ -0,0 +1,99 @@
+"""
+Primary / read replica database routing.
+
+replica_routing_middleware marks safe (GET, HEAD, OPTIONS) requests as allowed
+to read from a replica, and PrimaryReplicaRouter sends those reads to one of
+settings.DATABASE_REPLICAS. Everything else reads and writes the primary:
+unsafe requests, management commands and workers (no middleware), queries
+inside a transaction, and every request made by a client within
+REPLICA_STICKY_SECONDS of its last write, so players read their own writes
+while the replicas catch up.
+"""
+import asyncio
+import random
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+# Database cache tables hold locks and live game state, never read them from a replica
+PRIMARY_ONLY_APPS = ('django_cache',)
+STICKY_COOKIE = 'ranker_primary_until'
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replicas() -> list:
+    return getattr(settings, 'DATABASE_REPLICAS', [])
+
+
+class PrimaryReplicaRouter(object):
+
+    def db_for_read(self, model, **hints):
+        if not _replica_reads.get() or not replicas():
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label in PRIMARY_ONLY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas())
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def sticky_seconds() -> int:
+    return getattr(settings, 'REPLICA_STICKY_SECONDS', 15)
+
+
+def is_sticky(request) -> bool:
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def allows_replica_reads(request) -> bool:
+    return request.method in SAFE_METHODS and not is_sticky(request)
+
+
+def mark_writer(request, response):
+    """Keep a client that just wrote on the primary for sticky_seconds."""
+    if request.method not in SAFE_METHODS and replicas():
+        sticky = sticky_seconds()
+        response.set_cookie(
+            STICKY_COOKIE, str(time.time() + sticky), max_age=sticky, httponly=True, samesite='Lax'
+        )
+    return response
+
+
+@sync_and_async_middleware
+def replica_routing_middleware(get_response):
+    """Lets safe requests read from replicas unless the client wrote recently."""
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _replica_reads.set(allows_replica_reads(request))
+            try:
+                response = await get_response(request)
+            finally:
+                _replica_reads.reset(token)
+            return mark_writer(request, response)
+    else:
+        def middleware(request):
+            token = _replica_reads.set(allows_replica_reads(request))
+            try:
+                response = get_response(request)
+            finally:
+                _replica_reads.reset(token)
+            return mark_writer(request, response)
+    return middleware
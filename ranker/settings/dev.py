@@ -48,9 +48,12 @@ INSTALLED_APPS = [
     'ranker.users',
     'ranker.wordle',
     'ranker.core', 
+    'ranker.jobs',
 ]
 
 MIDDLEWARE = [
+    'ranker.routers.replica_routing_middleware',
+    'ranker.core.identity.identity_map_middleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -69,7 +72,8 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.SessionAuthentication'
+        'rest_framework.authentication.SessionAuthentication',
+        'ranker.users.authentication.CachedTokenAuthentication',
     ],
 }
 
@@ -93,6 +97,13 @@ TEMPLATES = [
 
 DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 
+# Players are resolved through the cache, ModelBackend stays listed so
+# sessions created before the cached backend keep working
+AUTHENTICATION_BACKENDS = [
+    'ranker.users.authentication.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
 # AUTHENTICATION_BACKENDS = [
 #     # Needed to login by username in Django admin, regardless of `allauth`
 #     'django.contrib.auth.backends.ModelBackend',
@@ -102,6 +113,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
 # ]
 
 WSGI_APPLICATION = 'ranker.wsgi.application'
+ASGI_APPLICATION = 'ranker.asgi.application'
+
+# Route the read-only endpoints to their async views, for the ASGI server
+ASYNC_READ_VIEWS = bool(os.getenv('RANKER_ASYNC_READ_VIEWS', ''))
 
 LOGIN_REDIRECT_URL = '/'
 
@@ -173,6 +188,12 @@ DATABASES = {
     }
 }
 
+# Read replicas (aliases in DATABASES), see ranker/routers.py. Clients read
+# from the primary for REPLICA_STICKY_SECONDS after any write.
+DATABASE_REPLICAS = []
+DATABASE_ROUTERS = ['ranker.routers.PrimaryReplicaRouter']
+REPLICA_STICKY_SECONDS = 15
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -235,6 +256,41 @@ REST_AUTH_REGISTER_SERIALIZERS = {
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'dist', 'static')]
+# collectstatic writes gzip and brotli copies next to each file for whitenoise
+STATICFILES_STORAGE = 'whitenoise.storage.CompressedStaticFilesStorage'
+# The Vue build already hashes asset names (app.3f2a1b4c.js), cache those forever
+WHITENOISE_IMMUTABLE_FILE_TEST = r'^.+\.[0-9a-f]{8,}\.\w+$'
+
+# Single page app entry point, served from memory by ranker.views.index
+FRONTEND_INDEX = os.path.join(BASE_DIR, 'dist', 'index.html')
+
+
+# Precomputed feedback matrix for wordle analysis, see manage.py build_feedback_matrix
+WORDLE_FEEDBACK_MATRIX = os.path.join(BASE_DIR, 'ranker', 'wordle', 'constants', 'feedback_matrix.npy')
+
+
+# Wordles older than this are moved to the archive by manage.py sweep_wordles
+WORDLE_ARCHIVE_AFTER_DAYS = 400
+
+
+# Upper bound for the imports done at startup, see manage.py check_import_time
+STARTUP_IMPORT_BUDGET_MS = 1500
+
+# Threads computing the home page sections concurrently, see ranker.core.services.home
+HOME_SECTION_WORKERS = 4
+
+# Point in time ratings replay from a snapshot taken every this many matches
+# (and at the end of each match day), see manage.py snapshot_ratings
+RATING_SNAPSHOT_MATCHES = 500
+
+
+# Run background jobs right after the enqueuing transaction commits instead
+# of leaving them to manage.py run_jobs
+JOBS_EAGER = False
+
+
+# Player autocomplete: 'memory' (per worker index) or 'database' (PostgreSQL trigram index)
+PLAYER_SEARCH_BACKEND = 'memory'
 
 
 # Caching stats page
@@ -246,5 +302,24 @@ CACHES = {
     'leaderboard': {
         'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
         'LOCATION': 'leaderboard_cache',
-    }
+    },
+    # Sessions and authenticated players, see ranker.users.authentication.
+    # Only cached in a shared in-memory tier (prod with REDIS_URL): a per
+    # process cache misses logouts made in other workers, and a database
+    # cache costs as many queries as the lookups it saves
+    'sessions': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    },
+    # Active wordle games, only held here on Redis or memcached (see
+    # ranker.wordle.services.sessions), must never cull entries still in play
+    'wordle': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'wordle_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    },
 }
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_CACHE_ALIAS = 'sessions'
@@ -9,6 +9,34 @@ DATABASES = {
         default=os.getenv('DATABASE_URL')
     )
 }
+
+# Comma separated read replica URLs
+DATABASE_REPLICAS = []
+for i, url in enumerate(filter(None, os.getenv('DATABASE_REPLICA_URLS', '').split(','))):
+    DATABASES[f'replica_{i}'] = dj_database_url.parse(url.strip())
+    DATABASES[f'replica_{i}']['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(f'replica_{i}')
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', REPLICA_STICKY_SECONDS))
+
+# Shared cache tier for active wordle games when a Redis instance is attached
+if os.getenv('REDIS_URL'):
+    CACHES['wordle'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+    CACHES['sessions'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    CACHES['leaderboard'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+JOBS_EAGER = bool(os.getenv('RANKER_JOBS_EAGER', ''))
+PLAYER_SEARCH_BACKEND = os.getenv('PLAYER_SEARCH_BACKEND', PLAYER_SEARCH_BACKEND)
+
 DEBUG = bool(os.getenv('RANKER_DEBUG', ''))
 SECRET_KEY = os.getenv('RANKER_SECRET_KEY', SECRET_KEY)
 
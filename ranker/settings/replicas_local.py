@@ -0,0 +1,23 @@
+""" Local settings with two SQLite databases standing in for a primary and a read replica
+
+The replica only changes when the primary file is copied over it, which
+makes replica lag easy to reproduce:
+
+    python manage.py migrate --settings=ranker.settings.replicas_local
+    cp db.sqlite3 db.replica.sqlite3
+"""
+from .dev import *
+
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    },
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.replica.sqlite3'),
+        'TEST': {'MIRROR': 'default'},
+    },
+}
+DATABASE_REPLICAS = ['replica']
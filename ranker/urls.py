@@ -15,7 +15,8 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, re_path, include
-from django.views.generic import TemplateView
+
+from ranker.views import index
 
 
 urlpatterns = [
@@ -23,11 +24,12 @@ urlpatterns = [
     path('api/v1/', include('ranker.core.urls')),
     path('api/v1/', include('ranker.wordle.urls')),
     path('api/v1/', include('ranker.users.urls')),
+    path('api/v1/', include('ranker.jobs.urls')),
     path('auth/', include('dj_rest_auth.urls')),
     path('auth/registration/', include('dj_rest_auth.registration.urls'))
 ]
 
 # Always the last one for correct frontend routing
 urlpatterns += [
-    re_path('(?!admin)^.*$', TemplateView.as_view(template_name='index.html'), name='app'),
+    re_path('(?!admin)^.*$', index, name='app'),
 ]
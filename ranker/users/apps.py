@@ -2,3 +2,6 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     name = 'ranker.users'
+
+    def ready(self):
+        from ranker.users import signals  # noqa: F401
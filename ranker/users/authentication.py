@@ -0,0 +1,79 @@
+"""
+Session and token authentication served from the ``sessions`` cache.
+
+The authenticated player is cached for a short time under its id, and an API
+token under a hash of its key, so an authenticated request normally resolves
+without touching the player or token tables. Player saves and token deletes
+drop the cached entries (see ranker.users.signals).
+
+The alias is only a real cache on a shared in-memory tier (Redis). Otherwise
+it is a DummyCache and these are the plain player and token lookups.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+USER_CACHE_TIMEOUT = 60
+TOKEN_CACHE_TIMEOUT = 5 * 60
+
+
+def _cache():
+    return caches[settings.SESSION_CACHE_ALIAS]
+
+
+def user_cache_key(user_id) -> str:
+    return f'auth:user:{user_id}'
+
+
+def token_cache_key(key: str) -> str:
+    return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def forget_user(user_id):
+    _cache().delete(user_cache_key(user_id))
+
+
+def forget_token(key: str):
+    _cache().delete(token_cache_key(key))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend whose user lookup (done on every request) goes through the cache."""
+
+    def get_user(self, user_id):
+        cache = _cache()
+        user = cache.get(user_cache_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(user_cache_key(user_id), user, USER_CACHE_TIMEOUT)
+        return user
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication for kiosks and bots, with the token to player lookup cached."""
+
+    def authenticate_credentials(self, key):
+        cache = _cache()
+        user_id = cache.get(token_cache_key(key))
+        if user_id is None:
+            model = self.get_model()
+            try:
+                token = model.objects.select_related('user').get(key=key)
+            except model.DoesNotExist:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+            user = token.user
+            cache.set(token_cache_key(key), user.pk, TOKEN_CACHE_TIMEOUT)
+            cache.set(user_cache_key(user.pk), user, USER_CACHE_TIMEOUT)
+        else:
+            user = CachedModelBackend().get_user(user_id)
+
+        if user is None or not user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        return (user, key)
@@ -0,0 +1,34 @@
+# Generated by Django 4.0.3 on 2026-10-19 10:05
+
+from django.db import migrations
+
+# Must match SEARCH_NAME_SQL in ranker.users.services.search, the planner only
+# uses the index for that exact expression. || and lower() are immutable,
+# concat() is not and cannot be indexed.
+SEARCH_NAME = "lower(firstname || ' ' || lastname || ' ' || username)"
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS player_search_name_trgm ON player USING gin (({SEARCH_NAME}) gin_trgm_ops)'
+    )
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS player_search_name_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
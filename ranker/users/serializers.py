@@ -1,8 +1,8 @@
 
-from numpy import require
 from rest_framework import serializers
 from ranker.wordle.constants.wordle import WORDLE_NUM_GUESSES
 
+from ranker.core.serializers import SparseFieldsetMixin
 from ranker.users.models import Player, CustomAccountManager
 from allauth.account import app_settings as allauth_settings
 from allauth.utils import email_address_exists
@@ -58,7 +58,7 @@ class RegisterSerializer(serializers.Serializer):
         user = account_manager.create_user(self, **cleaned_data)
         return user
 
-class PlayerSerializer(serializers.ModelSerializer):
+class PlayerSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     full_name = serializers.ReadOnlyField()
     avg_guesses = serializers.DecimalField(max_digits=10, decimal_places=2, required=False)
     avg_time = serializers.DurationField(required=False)
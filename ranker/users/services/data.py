@@ -1,7 +1,5 @@
 import datetime
 
-import pandas as pd
-
 from django.db.models import IntegerField, CharField, F, Value
 from django.db.models.functions import Concat, Cast
 from django.utils import timezone
@@ -138,6 +136,8 @@ def get_maxes() -> dict:
     if not Match.objects.exists():
         return dict()
 
+    import pandas as pd  # heavy, only imported once a view needs it
+
     matches = pd.DataFrame(Match.objects.values('winner_id', 'loser_id'))
     ratings = pd.DataFrame(PlayerRating.objects.values('player_id', 'rating'))
 
@@ -155,11 +155,12 @@ def get_maxes() -> dict:
     result = {}
 
     for metric, data in metrics:
-        idx = data.idxmax()
+        # Plain python numbers, the result is cached and must not need numpy to unpickle
+        idx = int(data.idxmax())
         result[metric] = [{
             'id': idx,
             'name': Player.objects.get(pk=idx).full_name,
-            'value': data[idx]
+            'value': data[idx].item()
         }]
         
     return result
@@ -179,6 +180,7 @@ def get_totals() -> list:
 
 
 def get_event_details(*, event_id: int, days: int = 365, n_events: int = 5) -> dict:
+    import pandas as pd
 
     all_matches = (
         Match.objects
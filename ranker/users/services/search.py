@@ -0,0 +1,250 @@
+"""
+Player autocomplete.
+
+The default backend is an in-memory index per worker: a sorted token list
+for prefix matches (binary search) and a trigram inverted index for fuzzy
+matches, ranked by the player's most recent activity. Player changes bump
+a version in the cache so every worker rebuilds its index, and the index is
+refreshed every SEARCH_INDEX_TTL seconds so activity stays current.
+
+On PostgreSQL, PLAYER_SEARCH_BACKEND = 'database' queries the trigram index
+created by the users migrations instead: substring matches and names within
+pg_trgm's similarity threshold (the % operator), ranked like the index
+(prefix matches, then similarity to a tenth) and by the same last activity.
+"""
+import bisect
+import datetime
+import heapq
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import BooleanField, DateTimeField, F, FloatField, Max, OuterRef, Subquery
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast, Greatest
+
+from ranker.core.models import Match
+from ranker.users.models import Player
+from ranker.wordle.models import WordleRollup
+
+SEARCH_INDEX_TTL = 10 * 60
+VERSION_CHECK_INTERVAL = 5
+VERSION_CACHE_KEY = 'players:search:version'
+MIN_SIMILARITY = 0.3
+# One and two letter queries match a large share of the tokens, their results are memoized per index
+SHORT_QUERY_LENGTH = 2
+# Expression of the player_search_name_trgm index (users migration 0002),
+# searched as is so the planner can use the index
+SEARCH_NAME_SQL = "lower(firstname || ' ' || lastname || ' ' || username)"
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    return ' '.join(text.lower().split())
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of each word padded like pg_trgm does."""
+    result = set()
+    for word in normalize(text).split(' '):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return result
+
+
+def _as_datetime(value):
+    if value is None:
+        return datetime.datetime.min
+    if isinstance(value, datetime.datetime):
+        return value.replace(tzinfo=None)
+    return datetime.datetime.combine(value, datetime.time.min)
+
+
+def _latest(queryset, field):
+    return Subquery(queryset.order_by(f'-{field}').values(field)[:1])
+
+
+def last_activity_expression():
+    """The last_activity() of the player as a database expression, PostgreSQL's GREATEST skips NULLs."""
+    wordles = WordleRollup.objects.filter(granularity=WordleRollup.DAY, player_id=OuterRef('pk'), word='')
+    return Greatest(
+        Cast(_latest(wordles, 'period_start'), DateTimeField()),
+        _latest(Match.objects.filter(winner_id=OuterRef('pk')), 'datetime'),
+        _latest(Match.objects.filter(loser_id=OuterRef('pk')), 'datetime'),
+        F('last_login'),
+        output_field=DateTimeField(),
+    )
+
+
+def last_activity() -> dict:
+    """Most recent wordle, match or login of every player that has one."""
+    activity = {}
+
+    def record(rows):
+        for player_id, when in rows:
+            when = _as_datetime(when)
+            if when > activity.get(player_id, datetime.datetime.min):
+                activity[player_id] = when
+
+    record(
+        WordleRollup.objects.filter(granularity=WordleRollup.DAY, player__isnull=False, word='')
+        .values('player_id').annotate(last=Max('period_start')).values_list('player_id', 'last')
+    )
+    record(Match.objects.values('winner_id').annotate(last=Max('datetime')).values_list('winner_id', 'last'))
+    record(Match.objects.values('loser_id').annotate(last=Max('datetime')).values_list('loser_id', 'last'))
+    record(Player.objects.filter(last_login__isnull=False).values_list('id', 'last_login'))
+    return activity
+
+
+class PlayerSearchIndex(object):
+    """Prefix and trigram index over player names and usernames."""
+
+    def __init__(self, players, activity):
+        self.players = {}
+        self.activity = {}
+        self.tokens = []
+        self.trigrams = {}
+        self.trigram_counts = {}
+
+        for player_id, firstname, lastname, username in players:
+            full_name = f'{firstname} {lastname}'
+            self.players[player_id] = {'id': player_id, 'full_name': full_name, 'username': username}
+            self.activity[player_id] = activity.get(player_id, datetime.datetime.min)
+
+            searchable = normalize(f'{full_name} {username}')
+            for token in {normalize(firstname), normalize(lastname), normalize(username), normalize(full_name)}:
+                if token:
+                    self.tokens.append((token, player_id))
+
+            player_trigrams = trigrams(searchable)
+            self.trigram_counts[player_id] = len(player_trigrams)
+            for trigram in player_trigrams:
+                self.trigrams.setdefault(trigram, []).append(player_id)
+
+        self.tokens.sort()
+        self.short_results = {}
+        self.built_at = time.monotonic()
+
+    def prefix_matches(self, query: str) -> set:
+        matches = set()
+        position = bisect.bisect_left(self.tokens, (query,))
+        while position < len(self.tokens) and self.tokens[position][0].startswith(query):
+            matches.add(self.tokens[position][1])
+            position += 1
+        return matches
+
+    def fuzzy_matches(self, query: str) -> dict:
+        """Players whose trigram similarity to the query is at least MIN_SIMILARITY."""
+        query_trigrams = trigrams(query)
+        shared = {}
+        for trigram in query_trigrams:
+            for player_id in self.trigrams.get(trigram, ()):
+                shared[player_id] = shared.get(player_id, 0) + 1
+
+        matches = {}
+        for player_id, count in shared.items():
+            similarity = count / (len(query_trigrams) + self.trigram_counts[player_id] - count)
+            if similarity >= MIN_SIMILARITY:
+                matches[player_id] = similarity
+        return matches
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """Prefix matches first, then fuzzy ones, most recently active first within each."""
+        query = normalize(query)
+        if not query:
+            return []
+        if len(query) <= SHORT_QUERY_LENGTH:
+            key = (query, limit)
+            if key not in self.short_results:
+                self.short_results[key] = self._search(query, limit)
+            return self.short_results[key]
+        return self._search(query, limit)
+
+    def _search(self, query: str, limit: int) -> list:
+        prefix = self.prefix_matches(query)
+        results = heapq.nlargest(limit, prefix, key=lambda player_id: self.activity[player_id])
+
+        if len(results) < limit and len(query) >= 3:
+            fuzzy = self.fuzzy_matches(query)
+            results += heapq.nlargest(
+                limit - len(results),
+                (player_id for player_id in fuzzy if player_id not in prefix),
+                key=lambda player_id: (round(fuzzy[player_id], 1), self.activity[player_id])
+            )
+
+        return [self.players[player_id] for player_id in results]
+
+
+def build_index() -> PlayerSearchIndex:
+    players = Player.objects.filter(is_active=True).values_list('id', 'firstname', 'lastname', 'username')
+    return PlayerSearchIndex(players, last_activity())
+
+
+class _IndexState(object):
+    version = None
+    checked_at = 0.0
+
+
+_state = _IndexState()
+
+
+def invalidate():
+    """Make every worker rebuild its index on its next search."""
+    global _index
+    _index = None
+    cache.set(VERSION_CACHE_KEY, time.time(), None)
+
+
+def get_index() -> PlayerSearchIndex:
+    global _index
+    now = time.monotonic()
+    if now - _state.checked_at > VERSION_CHECK_INTERVAL:
+        _state.checked_at = now
+        version = cache.get(VERSION_CACHE_KEY)
+        if version != _state.version:
+            _state.version = version
+            _index = None
+
+    index = _index
+    if index is None or now - index.built_at > SEARCH_INDEX_TTL:
+        with _index_lock:
+            if _index is None or now - _index.built_at > SEARCH_INDEX_TTL:
+                _index = build_index()
+            index = _index
+    return index
+
+
+def search_database(query: str, limit: int = 10) -> list:
+    """PostgreSQL only: substring and trigram similarity search on the player trigram index."""
+    query = normalize(query)
+    if not query:
+        return []
+    escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    # Both operators are served by the gin_trgm_ops index, % keeps names within
+    # pg_trgm.similarity_threshold (0.3 by default, like MIN_SIMILARITY)
+    matches = RawSQL(
+        f'({SEARCH_NAME_SQL}) LIKE %s OR ({SEARCH_NAME_SQL}) %% %s', [f'%{escaped}%', query], output_field=BooleanField()
+    )
+    # The index's tiers: prefix matches of a name, the full name or the
+    # username first, then the others by similarity rounded to a tenth
+    rank = RawSQL(
+        "CASE WHEN lower(firstname) LIKE %s OR lower(lastname) LIKE %s OR lower(username) LIKE %s"
+        " OR lower(firstname || ' ' || lastname) LIKE %s"
+        f" THEN 2 ELSE round(similarity({SEARCH_NAME_SQL}, %s)::numeric, 1) END",
+        [f'{escaped}%'] * 4 + [query], output_field=FloatField()
+    )
+    players = (
+        Player.objects.filter(matches, is_active=True)
+        .annotate(rank=rank, last_active=last_activity_expression())
+        .order_by('-rank', F('last_active').desc(nulls_last=True), 'id')[:limit]
+    )
+    return [{'id': p.id, 'full_name': p.full_name, 'username': p.username} for p in players]
+
+
+def search_players(query: str, limit: int = 10) -> list:
+    if getattr(settings, 'PLAYER_SEARCH_BACKEND', 'memory') == 'database':
+        return search_database(query, limit)
+    return get_index().search(query, limit)
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from ranker.users.authentication import forget_token, forget_user
+from ranker.users.models import Player
+from ranker.users.services import search
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def invalidate_player_search(sender, **kwargs):
+    """Names and active flags feed the search index, rebuild it after any change."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and update_fields <= {'last_login', 'password'}:
+        return
+    search.invalidate()
+
+
+@receiver(post_save, sender=Player)
+@receiver(post_delete, sender=Player)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Profile, password and active flag changes must reach authentication right away."""
+    forget_user(instance.pk)
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(sender, instance, **kwargs):
+    forget_token(instance.key)
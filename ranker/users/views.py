@@ -1,5 +1,8 @@
-from django.db.models import Avg, Count, Case, When
+from django.db.models import F, Value
+from django.http import HttpResponse
+from django.db.models.functions import Coalesce
 from rest_framework.authentication import SessionAuthentication
+from ranker.users.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework.views import APIView
@@ -16,9 +19,11 @@ from ranker.core.models import (
 from ranker.core.serializers import (
     RatingHistorySerializer,
     MatchHistorySerializer,
+    requested_fields,
 )
 from ranker.wordle.models import (
     Wordle,
+    PlayerWordleAggregate,
 )
 from ranker.wordle.serializers import (
     WordleSerializer
@@ -30,95 +35,148 @@ from ranker.users.models import (
 from ranker.users.serializers import (
     PlayerSerializer
 )
-from ranker.core.services import data
+from ranker.core import identity
+from ranker.core.services import data, snapshots
+from ranker.core.async_views import AsyncAPIView, APIJsonResponse, run_query
+from ranker.users.services.search import search_players
+
+PLAYER_SEARCH_LIMIT = 10
+PLAYER_SEARCH_MAX_LIMIT = 50
+
+# Annotations behind the aggregate fields of PlayerSerializer, only added
+# (and only joined) when the requested fields need them
+PLAYER_ANNOTATIONS = {
+    'avg_guesses': F('wordle_aggregate__avg_guesses'),
+    'avg_time': F('wordle_aggregate__avg_time'),
+    'total_wordles': Coalesce(F('wordle_aggregate__total'), Value(0)),
+    'fails': Coalesce(F('wordle_aggregate__fails'), Value(0)),
+}
+PLAYER_COLUMNS = {
+    'id': ['id'],
+    'full_name': ['firstname', 'lastname'],
+    'firstname': ['firstname'],
+    'lastname': ['lastname'],
+}
+
+
+def player_queryset(fields, annotations):
+    """Players with the given annotations, trimmed down to what ?fields asks for."""
+    if fields is not None:
+        annotations = [name for name in annotations if name in fields]
+    queryset = Player.objects.annotate(**{name: PLAYER_ANNOTATIONS[name] for name in annotations})
+    if fields is not None:
+        columns = {column for field in fields for column in PLAYER_COLUMNS.get(field, [])}
+        queryset = queryset.only('id', *columns)
+    return queryset
+
 
 class PlayerList(APIView):
     """
-    List of all players
+    List of all players, ?fields=id,full_name limits the response (and the
+    query) to the listed fields
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        players = Player.objects.annotate(avg_guesses=Avg('wordle__guesses'))
-        serializer = PlayerSerializer(players, many=True)
+        fields = requested_fields(request)
+        players = player_queryset(fields, ['avg_guesses'])
+        serializer = PlayerSerializer(players, many=True, fields=fields)
         return Response(serializer.data)
 
 
+class PlayerSearch(APIView):
+    """
+    Player autocomplete, ?q=<name prefix or approximate name>&limit=10
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        query = request.query_params.get('q', '')
+        try:
+            limit = min(int(request.query_params.get('limit', PLAYER_SEARCH_LIMIT)), PLAYER_SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({'limit': 'Must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'limit': 'Must be positive'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(search_players(query, limit))
+
+
 class PlayerDetail(APIView):
     """
     Player data
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
+        fields = requested_fields(request)
         try:
-            player = Player.objects.annotate(avg_guesses=Avg('wordle__guesses')).get(pk=player_id)
-            serializer = PlayerSerializer(player)
+            player = player_queryset(fields, ['avg_guesses']).get(pk=player_id)
+            serializer = PlayerSerializer(player, fields=fields)
             response = Response(serializer.data)
         except Player.DoesNotExist:
             response = Response(status=status.HTTP_404_NOT_FOUND)
         return response
 
 
+class AsyncPlayerDetail(AsyncAPIView):
+
+    async def get(self, request, player_id):
+        fields = requested_fields(request)
+
+        def player_data():
+            player = player_queryset(fields, ['avg_guesses']).get(pk=player_id)
+            return PlayerSerializer(player, fields=fields).data
+
+        try:
+            return APIJsonResponse(await run_query(player_data))
+        except Player.DoesNotExist:
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+
+
 
 class PlayerWordleStats(APIView):
     """
     Player history rating for charts
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
+        fields = requested_fields(request)
         try:
-            queryset = Player.objects.annotate(
-                avg_guesses=Avg('wordle__guesses'), 
-                avg_time=Avg('wordle__time'), 
-                total_wordles=Count('wordle'),
-                fails=Count(Case(When(wordle__fail=True, then=1)))
-            ).get(pk=player_id)
-            serializer = PlayerSerializer(queryset)
+            queryset = player_queryset(fields, PLAYER_ANNOTATIONS.keys()).get(pk=player_id)
+            serializer = PlayerSerializer(queryset, fields=fields)
             return Response(serializer.data)
-        except PlayerRating.DoesNotExist:
+        except Player.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
 class PlayerWordleGuessDistribution(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
-        try:
-            queryset = Wordle.objects.filter(player=player_id).values('guesses', 'fail').order_by('guesses')
-            guess_distribution = {}
-
-            for i in range(1, WORDLE_NUM_GUESSES+1):
-                guess_distribution.setdefault(i, 0)
-
-            for wordle in queryset:
-                if not wordle['fail']:
-                    guesses = wordle['guesses']
-                    if guesses not in guess_distribution:
-                        guess_distribution.setdefault(guesses, 1)
-                    else:
-                        guess_distribution[guesses] += 1
+        aggregate = PlayerWordleAggregate.objects.filter(player=player_id).first()
 
-            response = {}
-            response['labels'] = guess_distribution.keys()
-            response['data'] = guess_distribution.values()
+        response = {}
+        response['labels'] = list(range(1, WORDLE_NUM_GUESSES+1))
+        response['data'] = aggregate.distribution if aggregate else [0] * WORDLE_NUM_GUESSES
 
-            return Response(response)
-        except PlayerRating.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(response)
 
 class PlayerWordles(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
         try:
+            fields = requested_fields(request)
             queryset = Wordle.objects.filter(player=player_id).order_by('-date')
-            serializer = WordleSerializer(queryset, many=True)
+            if fields is None or 'player_name' in fields:
+                queryset = queryset.select_related('player')
+            serializer = WordleSerializer(queryset, many=True, fields=fields)
             return Response(serializer.data)
         except PlayerRating.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
@@ -128,7 +186,7 @@ class PlayerMatchHistory(APIView):
     """
     Player match history
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
@@ -140,7 +198,7 @@ class PlayerRatingHistory(APIView):
     """
     Player history rating for charts
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
@@ -152,16 +210,53 @@ class PlayerRatingHistory(APIView):
             return Response(status=status.HTTP_404_NOT_FOUND)
 
 
+class PlayerRatingDetail(APIView):
+    """
+    Current rating of a player, or as it stood at ?as_of=<date or datetime>
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, player_id):
+        as_of = request.query_params.get('as_of')
+        if not as_of:
+            try:
+                rating = identity.current().get(PlayerRating, player_id).rating
+            except PlayerRating.DoesNotExist:
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            return Response({'id': player_id, 'rating': rating, 'as_of': None})
+
+        try:
+            when = snapshots.parse_as_of(as_of)
+        except ValueError:
+            return Response(snapshots.AS_OF_ERROR, status=status.HTTP_400_BAD_REQUEST)
+        _, ratings = snapshots.ratings_as_of(when)
+        if player_id not in ratings:
+            # Not rated yet at that time
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response({'id': player_id, 'rating': ratings[player_id], 'as_of': when})
+
+
 class PlayerStats(APIView):
     """
-    Simple player statistics
+    Simple player statistics, ?fields=win_count,lose_count only computes the
+    listed ones
     """
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, player_id):
         try:
-            stats = data.get_player_stats(player_id=player_id)
-            return Response(stats)
+            return Response(data.get_player_stats(player_id=player_id, fields=requested_fields(request)))
+        except PlayerRating.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+
+class AsyncPlayerStats(AsyncAPIView):
+
+    async def get(self, request, player_id):
+        try:
+            stats = await run_query(data.get_player_stats, player_id=player_id, fields=requested_fields(request))
         except PlayerRating.DoesNotExist:
-            return Response(status=status.HTTP_404_NOT_FOUND)
\ No newline at end of file
+            return HttpResponse(status=status.HTTP_404_NOT_FOUND)
+        return APIJsonResponse(stats)
@@ -0,0 +1,39 @@
+"""
+Entry point of the Vue single page app.
+
+Every deep link returns the same built dist/index.html. It is read once per
+process and served from memory with an ETag, so a page load costs no
+template rendering and a revalidation is answered with a 304.
+"""
+import functools
+import hashlib
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+
+
+@functools.lru_cache(maxsize=None)
+def load_index() -> tuple:
+    """Content and ETag of the built index.html."""
+    try:
+        with open(settings.FRONTEND_INDEX, 'rb') as index_file:
+            content = index_file.read()
+    except FileNotFoundError:
+        raise Http404('Frontend has not been built')
+    return content, f'"{hashlib.md5(content).hexdigest()}"'
+
+
+def index(request):
+    if settings.DEBUG:  # pick up rebuilds while developing
+        load_index.cache_clear()
+    content, etag = load_index()
+
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type='text/html; charset=utf-8')
+    response['ETag'] = etag
+    # index.html names the hashed bundles of the current build, always revalidate it
+    patch_cache_control(response, no_cache=True)
+    return response
@@ -1,5 +1,5 @@
 from django.contrib import admin
 
-from .models import Wordle, ActiveWordle
+from .models import Wordle, ActiveWordle, ArchivedWordle
 
-admin.site.register([Wordle, ActiveWordle])
+admin.site.register([Wordle, ActiveWordle, ArchivedWordle])
@@ -2,3 +2,6 @@ from django.apps import AppConfig
 
 class WordleConfig(AppConfig):
     name = 'ranker.wordle'
+
+    def ready(self):
+        from ranker.wordle import signals  # noqa: F401
@@ -1,2 +1,5 @@
 WORDLE_NUM_GUESSES = 6
-WORDLE_MAX_LENGTH = 5
\ No newline at end of file
+WORDLE_MAX_LENGTH = 5
+# Leaderboards only rank players with at least this many wordles
+WORDLE_LEADERS_MIN_GAMES = 10
+WORDLE_LEADERS_COUNT = 5
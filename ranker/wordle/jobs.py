@@ -0,0 +1,8 @@
+from ranker.jobs.registry import periodic
+from ranker.wordle.services import sessions
+
+
+@periodic(sessions.FLUSH_INTERVAL)
+def flush_wordle_sessions():
+    """Copy the guesses of games in progress to the database, so they survive losing the cache."""
+    sessions.flush_sessions()
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ranker.wordle.services import analysis
+
+
+class Command(BaseCommand):
+    help = 'Precompute the wordle feedback matrix used by post-game analysis.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Where to write the matrix (defaults to WORDLE_FEEDBACK_MATRIX)')
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        matrix = analysis.build_feedback_matrix()
+        path = options['output'] or analysis.matrix_path()
+        analysis.save_feedback_matrix(matrix, path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {matrix.shape[0]}x{matrix.shape[1]} feedback matrix to {path} '
+            f'in {time.perf_counter() - start:.1f}s'
+        ))
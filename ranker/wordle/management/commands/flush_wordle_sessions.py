@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ranker.wordle.services import sessions
+
+
+class Command(BaseCommand):
+    help = 'Write wordle games still in progress from the cache back to the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, default=0,
+            help='Keep running and flush every INTERVAL seconds'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = sessions.flush_sessions()
+            self.stdout.write(f'Flushed {flushed} active wordles')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from ranker.core.services import home
+from ranker.wordle.models import PlayerWordleAggregate, WordleRollup
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the per player wordle aggregates and the wordle rollups from '
+        'the wordle and archive tables. Wordles finished while it runs can be '
+        'missed, run it when quiet.'
+    )
+
+    def handle(self, *args, **options):
+        PlayerWordleAggregate.generate_aggregates()
+        WordleRollup.generate_rollups()
+        home.invalidate('wordle_leaders_guesses', 'wordle_leaders_time')
+        self.stdout.write(
+            f'Rebuilt {PlayerWordleAggregate.objects.count()} player aggregates '
+            f'and {WordleRollup.objects.count()} rollup rows'
+        )
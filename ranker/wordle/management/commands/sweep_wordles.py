@@ -0,0 +1,31 @@
+import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ranker.wordle.models import ActiveWordle, ArchivedWordle
+
+
+class Command(BaseCommand):
+    help = 'Delete abandoned wordle games and archive old wordles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--archive-after', type=int, default=settings.WORDLE_ARCHIVE_AFTER_DAYS,
+            help='Archive wordles older than this many days (0 disables archiving)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+
+        # Any game not finished on the day it started is abandoned
+        today_start = datetime.datetime.combine(today, datetime.time.min)
+        deleted, _ = ActiveWordle.objects.filter(start_time__lt=today_start).delete()
+        self.stdout.write(f'Deleted {deleted} abandoned wordles')
+
+        if options['archive_after']:
+            before = today - datetime.timedelta(days=options['archive_after'])
+            archived = ArchivedWordle.archive(before, batch_size=options['batch_size'])
+            self.stdout.write(f'Archived {archived} wordles played before {before}')
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wordle', '0002_alter_activewordle_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='wordle',
+            name='guess_history',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+    ]
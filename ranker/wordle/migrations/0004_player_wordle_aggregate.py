@@ -0,0 +1,75 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:22
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_aggregates(apps, schema_editor):
+    Wordle = apps.get_model('wordle', 'Wordle')
+    PlayerWordleAggregate = apps.get_model('wordle', 'PlayerWordleAggregate')
+
+    buckets = {
+        f'solved_in_{i}': models.Count(models.Case(models.When(fail=False, guesses=i, then=1)))
+        for i in range(1, 7)
+    }
+    rows = Wordle.objects.values('player_id').annotate(
+        total=models.Count('id'),
+        fails=models.Count(models.Case(models.When(fail=True, then=1))),
+        guesses_sum=models.Sum('guesses'),
+        time_sum=models.Sum('time'),
+        **buckets
+    ).order_by()
+
+    PlayerWordleAggregate.objects.bulk_create([
+        PlayerWordleAggregate(
+            avg_guesses=row['guesses_sum'] / row['total'],
+            avg_time=row['time_sum'] / row['total'],
+            **row
+        )
+        for row in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+        ('wordle', '0003_wordle_guess_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlayerWordleAggregate',
+            fields=[
+                ('player', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='wordle_aggregate', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('fails', models.PositiveIntegerField(default=0)),
+                ('guesses_sum', models.PositiveIntegerField(default=0)),
+                ('time_sum', models.DurationField(default=datetime.timedelta)),
+                ('avg_guesses', models.FloatField(null=True)),
+                ('avg_time', models.DurationField(null=True)),
+                ('solved_in_1', models.PositiveIntegerField(default=0)),
+                ('solved_in_2', models.PositiveIntegerField(default=0)),
+                ('solved_in_3', models.PositiveIntegerField(default=0)),
+                ('solved_in_4', models.PositiveIntegerField(default=0)),
+                ('solved_in_5', models.PositiveIntegerField(default=0)),
+                ('solved_in_6', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'player wordle aggregate',
+                'verbose_name_plural': 'player wordle aggregates',
+                'db_table': 'player_wordle_aggregate',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='playerwordleaggregate',
+            index=models.Index(condition=models.Q(('total__gte', 10)), fields=['avg_guesses'], name='wordle_agg_leaders_guesses'),
+        ),
+        migrations.AddIndex(
+            model_name='playerwordleaggregate',
+            index=models.Index(condition=models.Q(('total__gte', 10)), fields=['avg_time'], name='wordle_agg_leaders_time'),
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
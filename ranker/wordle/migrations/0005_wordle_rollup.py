@@ -0,0 +1,86 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:23
+
+import datetime
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_rollups(apps, schema_editor):
+    Wordle = apps.get_model('wordle', 'Wordle')
+    WordleRollup = apps.get_model('wordle', 'WordleRollup')
+
+    starts = {
+        'day': lambda date: date,
+        'week': lambda date: date - datetime.timedelta(days=date.weekday()),
+        'month': lambda date: date.replace(day=1),
+    }
+    rollups = {}
+    wordles = Wordle.objects.values_list('player_id', 'date', 'word', 'guesses', 'fail', 'time')
+    for player_id, date, word, guesses, fail, time in wordles.iterator():
+        for granularity, start in starts.items():
+            for key in (
+                (player_id, granularity, start(date), ''),
+                (None, granularity, start(date), ''),
+                (None, granularity, start(date), word),
+            ):
+                if key not in rollups:
+                    rollups[key] = WordleRollup(
+                        player_id=key[0], granularity=key[1], period_start=key[2], word=key[3]
+                    )
+                rollup = rollups[key]
+                rollup.count += 1
+                rollup.guesses_sum += guesses
+                rollup.time_sum += time
+                if fail:
+                    rollup.fails += 1
+                else:
+                    bucket = f'solved_in_{guesses}'
+                    setattr(rollup, bucket, getattr(rollup, bucket) + 1)
+
+    WordleRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wordle', '0004_player_wordle_aggregate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WordleRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('word', models.CharField(blank=True, default='', max_length=5)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('fails', models.PositiveIntegerField(default=0)),
+                ('guesses_sum', models.PositiveIntegerField(default=0)),
+                ('time_sum', models.DurationField(default=datetime.timedelta)),
+                ('solved_in_1', models.PositiveIntegerField(default=0)),
+                ('solved_in_2', models.PositiveIntegerField(default=0)),
+                ('solved_in_3', models.PositiveIntegerField(default=0)),
+                ('solved_in_4', models.PositiveIntegerField(default=0)),
+                ('solved_in_5', models.PositiveIntegerField(default=0)),
+                ('solved_in_6', models.PositiveIntegerField(default=0)),
+                ('player', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='wordle_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'wordle rollup',
+                'verbose_name_plural': 'wordle rollups',
+                'db_table': 'wordle_rollup',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='wordlerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('player__isnull', False)), fields=('player', 'granularity', 'period_start', 'word'), name='wordle_rollup_player_key'),
+        ),
+        migrations.AddConstraint(
+            model_name='wordlerollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('player__isnull', True)), fields=('granularity', 'period_start', 'word'), name='wordle_rollup_all_key'),
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
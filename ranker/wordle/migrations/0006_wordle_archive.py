@@ -0,0 +1,34 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:23
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('wordle', '0005_wordle_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedWordle',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('word', models.CharField(max_length=5)),
+                ('guesses', models.PositiveSmallIntegerField()),
+                ('date', models.DateField()),
+                ('time', models.DurationField()),
+                ('fail', models.BooleanField()),
+                ('guess_history', models.CharField(blank=True, default='', max_length=30)),
+                ('player', models.ForeignKey(default=None, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'archived wordle',
+                'verbose_name_plural': 'archived wordles',
+                'db_table': 'wordle_archive',
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.0.3 on 2026-10-19 08:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wordle', '0006_wordle_archive'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='activewordle',
+            index=models.Index(fields=['start_time'], name='active_wordle_start_time'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedwordle',
+            index=models.Index(fields=['player', 'date'], name='wordle_archive_player_date'),
+        ),
+        migrations.AddIndex(
+            model_name='wordle',
+            index=models.Index(fields=['player', 'date'], name='wordle_player_date'),
+        ),
+        migrations.AddIndex(
+            model_name='wordle',
+            index=models.Index(fields=['date', 'fail', 'guesses', 'time'], name='wordle_date_rank'),
+        ),
+        migrations.AddIndex(
+            model_name='wordle',
+            index=models.Index(condition=models.Q(('fail', True)), fields=['-id'], name='wordle_fail_id'),
+        ),
+    ]
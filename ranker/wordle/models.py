@@ -1,8 +1,23 @@
-from django.db import models
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import models, transaction
+from django.db.models import Case, Count, F, Q, Sum, When
 from django.utils.translation import gettext_lazy as _
 from ranker.users.models import Player
 
-from ranker.wordle.constants.wordle import WORDLE_MAX_LENGTH, WORDLE_NUM_GUESSES
+from ranker.wordle.constants.wordle import WORDLE_MAX_LENGTH, WORDLE_NUM_GUESSES, WORDLE_LEADERS_MIN_GAMES
+from ranker.wordle.services.words import feedback
+
+
+def period_start(date, granularity):
+    """First day of the day, week (starting Monday) or month containing date."""
+    if granularity == WordleRollup.WEEK:
+        return date - datetime.timedelta(days=date.weekday())
+    if granularity == WordleRollup.MONTH:
+        return date.replace(day=1)
+    return date
 
 class ActiveWordle(models.Model):
     player = models.OneToOneField(Player, on_delete=models.CASCADE)
@@ -23,23 +38,7 @@ class ActiveWordle(models.Model):
         correct = ""
         for i in range(0, int(len(self.guess_history) / WORDLE_MAX_LENGTH)):
             guess = self.guess_history[i*WORDLE_MAX_LENGTH:(i+1)*WORDLE_MAX_LENGTH]
-            word_copy = list(self.word)
-
-            for j, letter in enumerate(guess):
-                if letter == self.word[j]:
-                    word_copy.pop(word_copy.index(letter))
-
-            for j, letter in enumerate(guess):
-                if letter == self.word[j]:
-                    correct += "2"
-                    if letter in word_copy:
-                        word_copy.pop(word_copy.index(letter))
-                elif letter in word_copy:
-                    correct += "1"
-                    word_copy.pop(word_copy.index(letter))
-                else:
-                    correct += "0"
-                j += 1
+            correct += feedback(guess, self.word)
         return correct
 
     @property
@@ -50,6 +49,10 @@ class ActiveWordle(models.Model):
         db_table = 'active_wordle'
         verbose_name = ('Active Wordle')
         verbose_name_plural = ('Active Wordles')
+        indexes = [
+            # Sweeper: games started before today
+            models.Index(fields=['start_time'], name='active_wordle_start_time'),
+        ]
             
 
 class Wordle(models.Model):
@@ -59,7 +62,361 @@ class Wordle(models.Model):
     date = models.DateField(auto_now_add=True, blank=False)
     time = models.DurationField()
     fail = models.BooleanField(blank=False)
+    guess_history = models.CharField(max_length=WORDLE_MAX_LENGTH*WORDLE_NUM_GUESSES, blank=True, default='')
+
+    @property
+    def guess_list(self):
+        return [
+            self.guess_history[i*WORDLE_MAX_LENGTH:(i+1)*WORDLE_MAX_LENGTH]
+            for i in range(0, int(len(self.guess_history) / WORDLE_MAX_LENGTH))
+        ]
+
+    def save(self, *args, **kwargs):
+        counted_save(self, lambda: super(Wordle, self).save(*args, **kwargs))
+
     class Meta:
         db_table = 'wordle'
         verbose_name = ('wordle')
-        verbose_name_plural = ('wordles')
\ No newline at end of file
+        verbose_name_plural = ('wordles')
+        indexes = [
+            # Streaks and player history: one player's wordles by date
+            models.Index(fields=['player', 'date'], name='wordle_player_date'),
+            # Today's board: one day's wordles in rank order, also the archive cutoff
+            models.Index(fields=['date', 'fail', 'guesses', 'time'], name='wordle_date_rank'),
+            # Wall of shame: newest failed wordles
+            models.Index(fields=['-id'], name='wordle_fail_id', condition=Q(fail=True)),
+        ]
+
+
+class ArchivedWordle(models.Model):
+    """
+    Wordles moved out of the hot table by manage.py sweep_wordles. Aggregates
+    and rollups keep counting them, they just no longer slow down queries
+    on recent games.
+    """
+    id = models.IntegerField(primary_key=True)
+    player = models.ForeignKey(Player, default=None, on_delete=models.CASCADE)
+    word = models.CharField(max_length=5, blank=False)
+    guesses = models.PositiveSmallIntegerField(blank=False)
+    date = models.DateField(blank=False)
+    time = models.DurationField()
+    fail = models.BooleanField(blank=False)
+    guess_history = models.CharField(max_length=WORDLE_MAX_LENGTH*WORDLE_NUM_GUESSES, blank=True, default='')
+
+    def save(self, *args, **kwargs):
+        counted_save(self, lambda: super(ArchivedWordle, self).save(*args, **kwargs))
+
+    @staticmethod
+    def archive(before, batch_size=1000):
+        """Move wordles played before the given date into the archive, returns how many."""
+        moved = 0
+        fields = ['id', 'player_id', 'word', 'guesses', 'date', 'time', 'fail', 'guess_history']
+        while True:
+            with transaction.atomic():
+                rows = list(Wordle.objects.filter(date__lt=before).order_by('date').values(*fields)[:batch_size])
+                if not rows:
+                    return moved
+                ArchivedWordle.objects.bulk_create([ArchivedWordle(**row) for row in rows], ignore_conflicts=True)
+                with archiving():
+                    Wordle.objects.filter(id__in=[row['id'] for row in rows]).delete()
+            moved += len(rows)
+
+    class Meta:
+        db_table = 'wordle_archive'
+        verbose_name = ('archived wordle')
+        verbose_name_plural = ('archived wordles')
+        indexes = [
+            models.Index(fields=['player', 'date'], name='wordle_archive_player_date'),
+        ]
+
+
+class PlayerWordleAggregate(models.Model):
+    """Running wordle totals per player, updated with every new wordle."""
+    player = models.OneToOneField(
+        Player, primary_key=True, related_name='wordle_aggregate', on_delete=models.CASCADE
+    )
+    total = models.PositiveIntegerField(default=0)
+    fails = models.PositiveIntegerField(default=0)
+    guesses_sum = models.PositiveIntegerField(default=0)
+    time_sum = models.DurationField(default=datetime.timedelta)
+    avg_guesses = models.FloatField(null=True)
+    avg_time = models.DurationField(null=True)
+    # Solved wordles by number of guesses
+    solved_in_1 = models.PositiveIntegerField(default=0)
+    solved_in_2 = models.PositiveIntegerField(default=0)
+    solved_in_3 = models.PositiveIntegerField(default=0)
+    solved_in_4 = models.PositiveIntegerField(default=0)
+    solved_in_5 = models.PositiveIntegerField(default=0)
+    solved_in_6 = models.PositiveIntegerField(default=0)
+
+    @property
+    def distribution(self):
+        return [getattr(self, f'solved_in_{i}') for i in range(1, WORDLE_NUM_GUESSES+1)]
+
+    def update_averages(self):
+        self.avg_guesses = self.guesses_sum / self.total if self.total else None
+        self.avg_time = self.time_sum / self.total if self.total else None
+
+    def count(self, wordle, sign: int = 1):
+        """Add (or with sign -1 take out) a wordle, the caller saves."""
+        self.total += sign
+        self.guesses_sum += sign * wordle.guesses
+        self.time_sum += sign * wordle.time
+        if wordle.fail:
+            self.fails += sign
+        else:
+            bucket = f'solved_in_{wordle.guesses}'
+            setattr(self, bucket, getattr(self, bucket) + sign)
+        self.update_averages()
+
+    @staticmethod
+    def add_wordle(wordle):
+        """Count a new wordle, locking the player's row for the current transaction."""
+        aggregate, _ = PlayerWordleAggregate.objects.select_for_update().get_or_create(player_id=wordle.player_id)
+        aggregate.count(wordle)
+        aggregate.save()
+
+    @staticmethod
+    def remove_wordle(wordle):
+        """Uncount a deleted wordle, or the previous values of an edited one."""
+        aggregate = PlayerWordleAggregate.objects.select_for_update().filter(player_id=wordle.player_id).first()
+        if aggregate is None:
+            # Deleted along with the player
+            return
+        aggregate.count(wordle, -1)
+        aggregate.save()
+
+    @staticmethod
+    def generate_aggregates():
+        """Rebuild every player's aggregate from the wordle and archive tables."""
+        buckets = {
+            f'solved_in_{i}': Count(Case(When(fail=False, guesses=i, then=1)))
+            for i in range(1, WORDLE_NUM_GUESSES+1)
+        }
+        totals = {}
+        for model in (Wordle, ArchivedWordle):
+            rows = model.objects.values('player_id').annotate(
+                total=Count('id'),
+                fails=Count(Case(When(fail=True, then=1))),
+                guesses_sum=Sum('guesses'),
+                time_sum=Sum('time'),
+                **buckets
+            ).order_by()
+            for row in rows:
+                player_id = row.pop('player_id')
+                if player_id in totals:
+                    totals[player_id] = {name: value + row[name] for name, value in totals[player_id].items()}
+                else:
+                    totals[player_id] = row
+
+        aggregates = []
+        for player_id, row in totals.items():
+            aggregate = PlayerWordleAggregate(player_id=player_id, **row)
+            aggregate.update_averages()
+            aggregates.append(aggregate)
+
+        with transaction.atomic():
+            PlayerWordleAggregate.objects.all().delete()
+            PlayerWordleAggregate.objects.bulk_create(aggregates)
+
+    class Meta:
+        db_table = 'player_wordle_aggregate'
+        verbose_name = ('player wordle aggregate')
+        verbose_name_plural = ('player wordle aggregates')
+        indexes = [
+            # Leaderboards: top players by average among those with enough wordles
+            models.Index(
+                fields=['avg_guesses'], name='wordle_agg_leaders_guesses',
+                condition=Q(total__gte=WORDLE_LEADERS_MIN_GAMES)
+            ),
+            models.Index(
+                fields=['avg_time'], name='wordle_agg_leaders_time',
+                condition=Q(total__gte=WORDLE_LEADERS_MIN_GAMES)
+            ),
+        ]
+
+class WordleRollup(models.Model):
+    """
+    Wordle totals per period (day, week or month). Rows with no player cover
+    everybody and rows with no word cover every word; per-player rows are
+    only kept for all words so an insert touches a fixed handful of rows.
+    """
+    DAY = 'day'
+    WEEK = 'week'
+    MONTH = 'month'
+    GRANULARITY_CHOICES = [
+        (DAY, _('Day')),
+        (WEEK, _('Week')),
+        (MONTH, _('Month')),
+    ]
+
+    player = models.ForeignKey(
+        Player, null=True, blank=True, related_name='wordle_rollups', on_delete=models.CASCADE
+    )
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    period_start = models.DateField()
+    word = models.CharField(max_length=WORDLE_MAX_LENGTH, blank=True, default='')
+    count = models.PositiveIntegerField(default=0)
+    fails = models.PositiveIntegerField(default=0)
+    guesses_sum = models.PositiveIntegerField(default=0)
+    time_sum = models.DurationField(default=datetime.timedelta)
+    solved_in_1 = models.PositiveIntegerField(default=0)
+    solved_in_2 = models.PositiveIntegerField(default=0)
+    solved_in_3 = models.PositiveIntegerField(default=0)
+    solved_in_4 = models.PositiveIntegerField(default=0)
+    solved_in_5 = models.PositiveIntegerField(default=0)
+    solved_in_6 = models.PositiveIntegerField(default=0)
+
+    @property
+    def distribution(self):
+        return [getattr(self, f'solved_in_{i}') for i in range(1, WORDLE_NUM_GUESSES+1)]
+
+    @staticmethod
+    def keys_for(wordle):
+        """The (player, granularity, period_start, word) rows a wordle counts towards."""
+        keys = []
+        for granularity, _label in WordleRollup.GRANULARITY_CHOICES:
+            start = period_start(wordle.date, granularity)
+            keys.append((wordle.player_id, granularity, start, ''))
+            keys.append((None, granularity, start, ''))
+            keys.append((None, granularity, start, wordle.word))
+        return keys
+
+    @staticmethod
+    def add_wordle(wordle):
+        """Count a new wordle in every rollup row it belongs to."""
+        keys = WordleRollup.keys_for(wordle)
+        WordleRollup.objects.bulk_create([
+            WordleRollup(player_id=player_id, granularity=granularity, period_start=start, word=word)
+            for player_id, granularity, start, word in keys
+        ], ignore_conflicts=True)
+        WordleRollup._update(keys, wordle, 1)
+
+    @staticmethod
+    def remove_wordle(wordle):
+        """Uncount a deleted wordle, or the previous values of an edited one."""
+        WordleRollup._update(WordleRollup.keys_for(wordle), wordle, -1)
+
+    @staticmethod
+    def _update(keys, wordle, sign: int):
+        rows = Q()
+        for player_id, granularity, start, word in keys:
+            rows |= Q(player_id=player_id, granularity=granularity, period_start=start, word=word)
+        # Lock in primary key order so concurrent inserts cannot deadlock
+        pks = list(WordleRollup.objects.select_for_update().filter(rows).order_by('pk').values_list('pk', flat=True))
+
+        changes = {
+            'count': F('count') + sign,
+            'guesses_sum': F('guesses_sum') + sign * wordle.guesses,
+            'time_sum': F('time_sum') + sign * wordle.time,
+        }
+        if wordle.fail:
+            changes['fails'] = F('fails') + sign
+        else:
+            bucket = f'solved_in_{wordle.guesses}'
+            changes[bucket] = F(bucket) + sign
+        WordleRollup.objects.filter(pk__in=pks).update(**changes)
+
+    def tally(self, wordle):
+        """Add a wordle to an unsaved row, for rebuilds."""
+        self.count += 1
+        self.guesses_sum += wordle.guesses
+        self.time_sum += wordle.time
+        if wordle.fail:
+            self.fails += 1
+        else:
+            bucket = f'solved_in_{wordle.guesses}'
+            setattr(self, bucket, getattr(self, bucket) + 1)
+
+    @staticmethod
+    def generate_rollups():
+        """Rebuild every rollup row from the wordle and archive tables."""
+        fields = ['player_id', 'word', 'guesses', 'date', 'time', 'fail']
+        rollups = {}
+        for model in (Wordle, ArchivedWordle):
+            for values in model.objects.values_list(*fields).iterator(chunk_size=2000):
+                wordle = Wordle(**dict(zip(fields, values)))
+                for key in WordleRollup.keys_for(wordle):
+                    if key not in rollups:
+                        player_id, granularity, start, word = key
+                        rollups[key] = WordleRollup(
+                            player_id=player_id, granularity=granularity, period_start=start, word=word
+                        )
+                    rollups[key].tally(wordle)
+
+        with transaction.atomic():
+            WordleRollup.objects.all().delete()
+            WordleRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+    class Meta:
+        db_table = 'wordle_rollup'
+        verbose_name = ('wordle rollup')
+        verbose_name_plural = ('wordle rollups')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['player', 'granularity', 'period_start', 'word'],
+                condition=Q(player__isnull=False), name='wordle_rollup_player_key'
+            ),
+            models.UniqueConstraint(
+                fields=['granularity', 'period_start', 'word'],
+                condition=Q(player__isnull=True), name='wordle_rollup_all_key'
+            ),
+        ]
+
+
+_archiving = ContextVar('wordle_archiving', default=False)
+
+# Fields of a wordle the aggregates depend on
+COUNTED_FIELDS = ('player_id', 'word', 'guesses', 'date', 'time', 'fail')
+
+
+@contextmanager
+def archiving():
+    """Wordles deleted in the block moved to the archive, they stay counted."""
+    token = _archiving.set(True)
+    try:
+        yield
+    finally:
+        _archiving.reset(token)
+
+
+def is_archiving() -> bool:
+    return _archiving.get()
+
+
+def count_wordle(wordle):
+    """Count a new wordle, or the new values of an edited one, in the player's aggregate and the rollups."""
+    PlayerWordleAggregate.add_wordle(wordle)
+    WordleRollup.add_wordle(wordle)
+    _invalidate_boards(wordle)
+
+
+def uncount_wordle(wordle):
+    """Take a deleted wordle, or the previous values of an edited one, out of the aggregates and rollups."""
+    PlayerWordleAggregate.remove_wordle(wordle)
+    WordleRollup.remove_wordle(wordle)
+    _invalidate_boards(wordle)
+
+
+def counted_save(wordle, save):
+    """
+    Save a wordle or archived wordle with save() and keep the aggregates in
+    line: a new wordle is counted, an edit replaces its previous values.
+    """
+    with transaction.atomic():
+        previous = None
+        if not wordle._state.adding:
+            previous = type(wordle).objects.select_for_update().filter(pk=wordle.pk).first()
+        save()
+        if previous is None:
+            count_wordle(wordle)
+        elif any(getattr(previous, field) != getattr(wordle, field) for field in COUNTED_FIELDS):
+            uncount_wordle(previous)
+            count_wordle(wordle)
+
+
+def _invalidate_boards(wordle):
+    from ranker.core.services import home
+    from ranker.wordle.services.boards import invalidate_today_board
+    transaction.on_commit(lambda: invalidate_today_board(wordle.date))
+    transaction.on_commit(lambda: home.invalidate('wordle_stats', 'wordle_shame'))
@@ -1,12 +1,10 @@
 
-from numpy import require
 from rest_framework import serializers
 from ranker.wordle.constants.wordle import WORDLE_NUM_GUESSES
 
+from ranker.core.serializers import SparseFieldsetMixin
 from ranker.wordle.models import Wordle
-
-import json, os
-from ranker.settings.dev import BASE_DIR
+from ranker.wordle.services.words import dictionary
 
 class ActiveWordleSerializer(serializers.Serializer):
     guesses = serializers.IntegerField()
@@ -18,9 +16,8 @@ class ActiveWordleSerializer(serializers.Serializer):
     class Meta:
         exclude = ['word']
 
-wordle_dictionary = json.load(open(os.path.join(BASE_DIR, 'ranker/wordle/constants/dictionary.json')))
 def valid_guess(guess):
-    if guess not in wordle_dictionary:
+    if guess not in dictionary():
         raise serializers.ValidationError('Guess not a valid word')
 
 def valid_num_guesses(guesses):
@@ -29,12 +26,13 @@ def valid_num_guesses(guesses):
 
 class WordleGuessSerializer(serializers.Serializer):
     guess = serializers.CharField(max_length=5, validators=[valid_guess])
+    hard_mode = serializers.BooleanField(required=False, default=False)
 
-class WordleSerializer(serializers.ModelSerializer):
+class WordleSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     player_name = serializers.CharField(source='player.full_name', read_only=True)
     time = serializers.DurationField()
     rank = serializers.IntegerField(required=False)
     streak = serializers.IntegerField(required=False)
     class Meta:
         model = Wordle
-        fields = '__all__'
\ No newline at end of file
+        exclude = ['guess_history']
\ No newline at end of file
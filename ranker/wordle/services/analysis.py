@@ -0,0 +1,189 @@
+"""
+Post-game wordle analysis backed by a precomputed feedback matrix.
+
+The matrix holds the feedback of every dictionary guess against every target
+word, encoded in base 3 (one uint8 per pair, 0-242). It is built offline with
+``manage.py build_feedback_matrix`` and memory mapped read-only, so workers
+share the pages and an analysis is a few array operations per guess.
+"""
+import math
+import os
+
+import numpy as np
+from django.conf import settings
+
+from ranker.wordle.constants.wordle import WORDLE_MAX_LENGTH
+from ranker.wordle.services.words import dictionary, target_words
+
+NUM_PATTERNS = 3 ** WORDLE_MAX_LENGTH
+PATTERN_POWERS = 3 ** np.arange(WORDLE_MAX_LENGTH)
+BUILD_CHUNK_SIZE = 256
+HINT_CHUNK_SIZE = 1024
+MAX_LISTED_CANDIDATES = 20
+
+_matrix = None
+_opening_hint = None
+
+
+class FeedbackMatrixUnavailable(Exception):
+    """Raised when the feedback matrix file is missing or out of date."""
+
+
+def matrix_path() -> str:
+    return getattr(
+        settings,
+        'WORDLE_FEEDBACK_MATRIX',
+        os.path.join(settings.BASE_DIR, 'ranker', 'wordle', 'constants', 'feedback_matrix.npy')
+    )
+
+
+def encode_feedback(result: str) -> int:
+    """Base 3 code of a feedback string such as '20110'."""
+    return sum(int(mark) * 3 ** i for i, mark in enumerate(result))
+
+
+def decode_feedback(code: int) -> str:
+    result = ''
+    for _ in range(WORDLE_MAX_LENGTH):
+        result += str(code % 3)
+        code //= 3
+    return result
+
+
+def _letters(index) -> np.ndarray:
+    return np.frombuffer(index.packed, dtype=np.uint8).reshape(-1, WORDLE_MAX_LENGTH) - ord('a')
+
+
+def build_feedback_matrix(guesses=None, answers=None) -> np.ndarray:
+    """Compute the (guesses x answers) feedback matrix, a chunk of guesses at a time."""
+    guesses = dictionary() if guesses is None else guesses
+    answers = target_words() if answers is None else answers
+    guess_letters = _letters(guesses)
+    answer_letters = _letters(answers)
+    n_answers = len(answer_letters)
+    answer_one_hot = np.eye(26, dtype=np.int8)[answer_letters]  # (answers, 5, 26)
+    matrix = np.empty((len(guess_letters), n_answers), dtype=np.uint8)
+
+    for start in range(0, len(guess_letters), BUILD_CHUNK_SIZE):
+        chunk = guess_letters[start:start + BUILD_CHUNK_SIZE]
+        rows = np.arange(len(chunk))[:, None]
+        columns = np.arange(n_answers)[None, :]
+        green = chunk[:, None, :] == answer_letters[None, :, :]  # (chunk, answers, 5)
+
+        # Letters of the answer not already matched by a green
+        remaining = np.einsum('caj,ajl->cal', (~green).astype(np.int8), answer_one_hot)
+        marks = green.astype(np.uint8) * 2
+
+        for i in range(WORDLE_MAX_LENGTH):
+            letter = chunk[:, i][:, None]
+            yellow = ~green[:, :, i] & (remaining[rows, columns, letter] > 0)
+            marks[:, :, i] += yellow
+            remaining[rows, columns, letter] -= yellow
+
+        matrix[start:start + len(chunk)] = (marks.astype(np.uint16) * PATTERN_POWERS).sum(axis=2)
+
+    return matrix
+
+
+def save_feedback_matrix(matrix: np.ndarray, path: str = None):
+    path = path or matrix_path()
+    temp_path = path + '.tmp.npy'
+    np.save(temp_path, matrix)
+    os.replace(temp_path, path)
+
+
+def feedback_matrix() -> np.ndarray:
+    """The memory mapped feedback matrix, loaded once per process."""
+    global _matrix
+    if _matrix is None:
+        try:
+            matrix = np.load(matrix_path(), mmap_mode='r')
+        except FileNotFoundError:
+            raise FeedbackMatrixUnavailable('Feedback matrix has not been built')
+        if matrix.shape != (len(dictionary()), len(target_words())):
+            raise FeedbackMatrixUnavailable('Feedback matrix does not match the word lists')
+        _matrix = matrix
+    return _matrix
+
+
+def entropy(patterns: np.ndarray) -> float:
+    """Expected information in bits of a guess given its patterns over the candidates."""
+    counts = np.bincount(patterns, minlength=NUM_PATTERNS)
+    probabilities = counts[counts > 0] / len(patterns)
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def best_guess(candidates: np.ndarray) -> dict:
+    """Entropy-optimal guess for a set of candidate answers, preferring possible answers on ties."""
+    global _opening_hint
+    if len(candidates) == 1:
+        return {'word': target_words().word(int(candidates[0])), 'expected_information': 0.0}
+
+    opening = len(candidates) == len(target_words())
+    if opening and _opening_hint is not None:
+        return _opening_hint
+
+    matrix = feedback_matrix()
+    n_candidates = len(candidates)
+    scores = np.empty(len(matrix))
+
+    for start in range(0, len(matrix), HINT_CHUNK_SIZE):
+        patterns = matrix[start:start + HINT_CHUNK_SIZE][:, candidates].astype(np.int32)
+        offsets = np.arange(len(patterns), dtype=np.int32)[:, None] * NUM_PATTERNS
+        counts = np.bincount(
+            (patterns + offsets).ravel(), minlength=len(patterns) * NUM_PATTERNS
+        ).reshape(len(patterns), NUM_PATTERNS)
+        probabilities = counts / n_candidates
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores[start:start + len(patterns)] = -np.nansum(probabilities * np.log2(probabilities), axis=1)
+
+    candidate_words = {target_words().word(int(answer)) for answer in candidates}
+    best = max(
+        np.flatnonzero(scores >= scores.max() - 1e-9),
+        key=lambda row: dictionary().word(row) in candidate_words
+    )
+    hint = {'word': dictionary().word(int(best)), 'expected_information': float(scores[best])}
+    if opening:
+        _opening_hint = hint
+    return hint
+
+
+def analyse_game(guesses: list, word: str, hints: bool = False) -> list:
+    """
+    Report for each guess how many answers were still possible before and
+    after it, and how much information it was expected to give and gave.
+    """
+    matrix = feedback_matrix()
+    answer = target_words().find(word)
+    if answer < 0:
+        raise ValueError(f'{word} is not a target word')
+
+    candidates = np.arange(len(target_words()))
+    steps = []
+
+    for guess in guesses:
+        row = dictionary().find(guess)
+        if row < 0:
+            raise ValueError(f'{guess} is not in the dictionary')
+
+        patterns = matrix[row][candidates]
+        observed = matrix[row, answer]
+        remaining = candidates[patterns == observed]
+
+        step = {
+            'guess': guess,
+            'feedback': decode_feedback(int(observed)),
+            'candidates_before': len(candidates),
+            'candidates_after': len(remaining),
+            'expected_information': entropy(patterns),
+            'information': math.log2(len(candidates) / len(remaining)),
+        }
+        if len(remaining) <= MAX_LISTED_CANDIDATES:
+            step['remaining'] = [target_words().word(int(i)) for i in remaining]
+        if hints:
+            step['hint'] = best_guess(candidates)
+
+        steps.append(step)
+        candidates = remaining
+
+    return steps
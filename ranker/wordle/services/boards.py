@@ -0,0 +1,74 @@
+"""
+Today's wordle board, cached in the ``leaderboard`` cache until the next
+wordle of the day is finished.
+"""
+import datetime
+
+from django.core.cache import caches
+from django.db.models.expressions import Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from ranker.wordle.models import ArchivedWordle, Wordle
+from ranker.wordle.serializers import WordleSerializer
+
+BOARD_CACHE = 'leaderboard'
+BOARD_CACHE_SECONDS = 10 * 60
+
+
+def board_key(day: datetime.date) -> str:
+    return f'wordle:today:{day.isoformat()}'
+
+
+def wordle_streak(player):
+    """
+    Returns how many days in a row a player has played (aka a players streak)
+    """
+    current_streak = 0
+    streak_day = datetime.date.today()
+
+    # Long streaks continue into the archive once the hot table runs out
+    for model in (Wordle, ArchivedWordle):
+        wordles = model.objects.filter(player=player, date__lte = streak_day).values("date", "fail").order_by("-date")
+
+        for wordle in wordles:
+            date = wordle['date']
+            fail = wordle['fail']
+
+            if (not fail) and (date == streak_day):
+                current_streak += 1
+                streak_day -= datetime.timedelta(days=1)
+            else:  # Awwww...
+                return current_streak  # The current streak is done
+
+    return current_streak
+
+
+def wordles_today() -> list:
+    """Today's wordles ranked, with the streak of each player."""
+    queryset = Wordle.objects.filter(
+        date=timezone.now().date()
+    ).select_related('player').order_by('fail', 'guesses', 'time').annotate(
+        rank=Window(
+            expression=RowNumber(),
+            order_by=['fail', 'guesses', 'time']
+        )
+    )
+    for obj in queryset:
+        obj.streak = wordle_streak(obj.player)
+
+    return WordleSerializer(queryset, many=True).data
+
+
+def get_today_board(*, refresh: bool = False) -> list:
+    cache = caches[BOARD_CACHE]
+    key = board_key(timezone.now().date())
+    board = None if refresh else cache.get(key)
+    if board is None:
+        board = wordles_today()
+        cache.set(key, board, BOARD_CACHE_SECONDS)
+    return board
+
+
+def invalidate_today_board(day: datetime.date):
+    caches[BOARD_CACHE].delete(board_key(day))
@@ -0,0 +1,36 @@
+"""
+Wordle leaderboards and totals shown on the home page.
+"""
+from django.db.models import F
+
+from ranker.users.models import Player
+from ranker.users.serializers import PlayerSerializer
+from ranker.wordle.constants.wordle import WORDLE_LEADERS_COUNT, WORDLE_LEADERS_MIN_GAMES
+from ranker.wordle.models import Wordle
+from ranker.wordle.serializers import WordleSerializer
+
+WALL_OF_SHAME_SIZE = 50
+
+
+def top_players(average: str) -> list:
+    """Players with the lowest avg_guesses or avg_time among those with enough wordles."""
+    queryset = Player.objects.filter(
+        wordle_aggregate__total__gte=WORDLE_LEADERS_MIN_GAMES
+    ).annotate(**{
+        average: F(f'wordle_aggregate__{average}'),
+        'total_wordles': F('wordle_aggregate__total'),
+    }).order_by(average)[:WORDLE_LEADERS_COUNT]
+    return PlayerSerializer(queryset, many=True).data
+
+
+def wordle_stats() -> dict:
+    return {
+        'num_wordles': Wordle.objects.count(),
+        'num_players': Player.objects.count(),
+    }
+
+
+def wall_of_shame() -> list:
+    """Newest failed wordles, the first page of wordle/shame."""
+    queryset = Wordle.objects.filter(fail=True).select_related('player').order_by('-id')[:WALL_OF_SHAME_SIZE]
+    return WordleSerializer(queryset, many=True).data
@@ -0,0 +1,87 @@
+"""
+Wordle analytics read from the WordleRollup table only.
+"""
+import datetime
+
+from django.db.models import ExpressionWrapper, F, FloatField
+
+from ranker.wordle.constants.wordle import WORDLE_NUM_GUESSES
+from ranker.wordle.models import WordleRollup, period_start
+
+
+def _scope(granularity: str, player_id: int = None):
+    return WordleRollup.objects.filter(granularity=granularity, player_id=player_id, word='')
+
+
+def previous_period(start: datetime.date, granularity: str) -> datetime.date:
+    if granularity == WordleRollup.DAY:
+        return start - datetime.timedelta(days=1)
+    if granularity == WordleRollup.WEEK:
+        return start - datetime.timedelta(days=7)
+    return (start - datetime.timedelta(days=1)).replace(day=1)
+
+
+def get_distribution(*, granularity: str, date: datetime.date, player_id: int = None) -> dict:
+    """Guess distribution of the period containing date, for a player or everybody."""
+    start = period_start(date, granularity)
+    rollup = _scope(granularity, player_id).filter(period_start=start).first()
+    distribution = rollup.distribution if rollup else [0] * WORDLE_NUM_GUESSES
+
+    return {
+        'granularity': granularity,
+        'period_start': start,
+        'labels': list(range(1, WORDLE_NUM_GUESSES+1)),
+        'data': distribution,
+        'count': rollup.count if rollup else 0,
+        'fails': rollup.fails if rollup else 0,
+    }
+
+
+def get_word_difficulty(*, granularity: str, date: datetime.date, limit: int = 10, min_count: int = 1) -> list:
+    """Hardest words played in the period containing date: highest fail rate, then most guesses."""
+    start = period_start(date, granularity)
+    words = WordleRollup.objects.filter(
+        granularity=granularity, player_id=None, period_start=start, count__gte=min_count
+    ).exclude(word='').annotate(
+        fail_rate=ExpressionWrapper(F('fails') * 1.0 / F('count'), output_field=FloatField()),
+        avg_guesses=ExpressionWrapper(F('guesses_sum') * 1.0 / F('count'), output_field=FloatField()),
+    ).order_by('-fail_rate', '-avg_guesses', 'word')[:limit]
+
+    return [
+        {
+            'word': rollup.word,
+            'count': rollup.count,
+            'fails': rollup.fails,
+            'fail_rate': rollup.fail_rate,
+            'avg_guesses': rollup.avg_guesses,
+        }
+        for rollup in words
+    ]
+
+
+def get_timeseries(*, granularity: str, periods: int, date: datetime.date, player_id: int = None) -> list:
+    """Count, fails and averages for the last periods ending with the one containing date."""
+    end = period_start(date, granularity)
+    start = end
+    for _ in range(periods - 1):
+        start = previous_period(start, granularity)
+
+    rollups = {
+        rollup.period_start: rollup
+        for rollup in _scope(granularity, player_id).filter(period_start__gte=start, period_start__lte=end)
+    }
+
+    series = []
+    current = end
+    for _ in range(periods):
+        rollup = rollups.get(current)
+        series.append({
+            'period_start': current,
+            'count': rollup.count if rollup else 0,
+            'fails': rollup.fails if rollup else 0,
+            'avg_guesses': rollup.guesses_sum / rollup.count if rollup and rollup.count else None,
+            'avg_time': rollup.time_sum / rollup.count if rollup and rollup.count else None,
+        })
+        current = previous_period(current, granularity)
+
+    return list(reversed(series))
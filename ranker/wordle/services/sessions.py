@@ -0,0 +1,206 @@
+"""
+Active wordle games held in the cache tier.
+
+A game in progress lives in the ``wordle`` cache keyed by player and day, and
+every change happens under a per-player cache lock, so a guess is one cache
+read-modify-write. The database sees a game three times: its ``ActiveWordle``
+row is inserted when it starts (the word survives losing the cache entry),
+``flush_sessions`` copies the guesses of the day's games to their rows every
+FLUSH_INTERVAL seconds (a periodic task of the run_jobs worker), and the
+game becomes a ``Wordle`` row when it finishes.
+
+That only pays off with an in-memory tier (Redis or memcached): on a
+DatabaseCache every cache call is a few queries, so games are then played on
+their ``ActiveWordle`` row directly, under a lock on the player row.
+"""
+import datetime
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.memcached import BaseMemcachedCache
+from django.core.cache.backends.redis import RedisCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.utils import timezone
+
+from ranker.wordle.constants.wordle import WORDLE_MAX_LENGTH
+from ranker.users.models import Player
+from ranker.wordle.models import ActiveWordle, Wordle
+
+WORDLE_CACHE = 'wordle'
+SESSION_TIMEOUT = 2 * 24 * 60 * 60
+LOCK_TIMEOUT = 10
+LOCK_WAIT = 5
+LOCK_POLL = 0.01
+# Guesses made since the last flush are lost with the cache entry
+FLUSH_INTERVAL = 60
+
+
+class SessionLocked(Exception):
+    """Raised when a lock could not be acquired in time."""
+
+
+def _cache():
+    return caches[WORDLE_CACHE]
+
+
+def cached_sessions() -> bool:
+    """Whether games are held in the cache, only on an in-memory shared tier."""
+    return isinstance(_cache(), (RedisCache, BaseMemcachedCache))
+
+
+def session_key(player_id: int, day) -> str:
+    return f'wordle:session:{player_id}:{day.isoformat()}'
+
+
+@contextmanager
+def cache_lock(key: str, timeout: int = LOCK_TIMEOUT, wait: float = LOCK_WAIT):
+    """Spin on an atomic cache add until the lock is ours, in-memory tiers only."""
+    if not cached_sessions():
+        # add() on a DatabaseCache is a count, a select and an insert per try
+        raise ImproperlyConfigured(f'The {WORDLE_CACHE} cache is not an in-memory tier, lock a row instead')
+    cache = _cache()
+    token = uuid.uuid4().hex
+    deadline = time.monotonic() + wait
+    while not cache.add(key, token, timeout):
+        if time.monotonic() > deadline:
+            raise SessionLocked(key)
+        time.sleep(LOCK_POLL)
+    try:
+        yield
+    finally:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+@contextmanager
+def _row_lock(player_id: int):
+    with transaction.atomic():
+        list(Player.objects.select_for_update().filter(pk=player_id).values_list('pk'))
+        yield
+
+
+def player_lock(player_id: int):
+    """Serializes the player's guesses: a cache lock, or a lock on their row when games are not cached."""
+    if cached_sessions():
+        return cache_lock(f'wordle:lock:{player_id}')
+    return _row_lock(player_id)
+
+
+def _to_session(player_id: int, state: dict) -> ActiveWordle:
+    session = ActiveWordle(
+        player_id=player_id,
+        word=state['word'],
+        guess_history=state['guess_history'],
+        start_time=state['start_time'],
+    )
+    session.finished = state['finished']
+    return session
+
+
+def _to_state(session: ActiveWordle) -> dict:
+    return {
+        'word': session.word,
+        'guess_history': session.guess_history,
+        'start_time': session.start_time,
+        'finished': session.finished,
+    }
+
+
+def _load_from_db(player_id: int, day) -> dict:
+    active_wordle = ActiveWordle.objects.filter(player_id=player_id).first()
+    if active_wordle is not None and active_wordle.date != day:
+        active_wordle = None
+
+    wordle = Wordle.objects.filter(player_id=player_id, date=day).first()
+    if wordle is not None:
+        guess_history = wordle.guess_history or '?'*WORDLE_MAX_LENGTH*(wordle.guesses-1)+wordle.word
+        return {
+            'word': wordle.word,
+            'guess_history': guess_history,
+            'start_time': active_wordle.start_time if active_wordle else timezone.now() - wordle.time,
+            'finished': True,
+        }
+
+    if active_wordle is not None:
+        return {
+            'word': active_wordle.word,
+            'guess_history': active_wordle.guess_history,
+            'start_time': active_wordle.start_time,
+            'finished': False,
+        }
+    return None
+
+
+def load(player_id: int, day) -> ActiveWordle:
+    """Today's game for the player, from the cache or rebuilt from the database."""
+    if not cached_sessions():
+        state = _load_from_db(player_id, day)
+        return _to_session(player_id, state) if state is not None else None
+    cache = _cache()
+    state = cache.get(session_key(player_id, day))
+    if state is None:
+        state = _load_from_db(player_id, day)
+        if state is None:
+            return None
+        cache.add(session_key(player_id, day), state, SESSION_TIMEOUT)
+    return _to_session(player_id, state)
+
+
+def start(player_id: int, word: str) -> ActiveWordle:
+    """A new game, its ActiveWordle row replaces the player's abandoned one from an earlier day."""
+    with transaction.atomic():
+        ActiveWordle.objects.filter(player_id=player_id).delete()
+        session = ActiveWordle.objects.create(player_id=player_id, word=word, guess_history='')
+    session.finished = False
+    return session
+
+
+def save(session: ActiveWordle):
+    if not cached_sessions():
+        if not session.finished:
+            ActiveWordle.objects.filter(player_id=session.player_id).update(guess_history=session.guess_history)
+        return
+    _cache().set(session_key(session.player_id, session.date), _to_state(session), SESSION_TIMEOUT)
+
+
+def finish(session: ActiveWordle) -> Wordle:
+    """Persist a finished game and drop its ActiveWordle row."""
+    with transaction.atomic():
+        wordle = Wordle.objects.create(
+            player_id=session.player_id,
+            word=session.word,
+            guesses=session.guesses,
+            date=session.date,
+            time=timezone.now()-session.start_time,
+            fail=not session.solved,
+            guess_history=session.guess_history
+        )
+        ActiveWordle.objects.filter(player_id=session.player_id).delete()
+    session.finished = True
+    return wordle
+
+
+def flush_sessions(day=None) -> int:
+    """Copy the guesses of the day's unfinished games from the cache to their rows, returns how many changed."""
+    if not cached_sessions():
+        return 0
+    day = day or timezone.now().date()
+    day_start = datetime.datetime.combine(day, datetime.time.min)
+    active_wordles = ActiveWordle.objects.filter(
+        start_time__gte=day_start, start_time__lt=day_start + datetime.timedelta(days=1)
+    )
+    active_wordles = {active_wordle.player_id: active_wordle for active_wordle in active_wordles}
+    states = _cache().get_many([session_key(player_id, day) for player_id in active_wordles])
+
+    changed = []
+    for player_id, active_wordle in active_wordles.items():
+        state = states.get(session_key(player_id, day))
+        if state is not None and not state['finished'] and state['guess_history'] != active_wordle.guess_history:
+            active_wordle.guess_history = state['guess_history']
+            changed.append(active_wordle)
+    # A game finishing meanwhile deletes its row, its update is then a no-op
+    ActiveWordle.objects.bulk_update(changed, ['guess_history'], batch_size=500)
+    return len(changed)
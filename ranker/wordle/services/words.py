@@ -0,0 +1,214 @@
+"""
+Compact word index used for guess validation and hard mode checks.
+
+Each word list is packed into a single bytes buffer (5 bytes per word) with
+an open addressing hash table stored in an array, so a lookup never scans the
+list and the whole index is a handful of flat buffers. The indexes are built
+on first use and memoized; when a preloaded app server (gunicorn --preload)
+loads them before forking, the buffers are shared read-only by every worker.
+"""
+import functools
+import json
+import os
+import random
+from array import array
+
+from ranker.wordle.constants.wordle import WORDLE_MAX_LENGTH
+
+CONSTANTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'constants')
+
+ALPHABET_SIZE = 26
+ALL_LETTERS = (1 << ALPHABET_SIZE) - 1
+LETTER_BITS = 5
+
+# Feedback marks, same characters as ActiveWordle.correct
+ABSENT = '0'
+PRESENT = '1'
+CORRECT = '2'
+
+_HASH_MULTIPLIER = 0x9E3779B1
+
+
+def letter_codes(word: str) -> list:
+    """Return the 0-25 code of each letter, or None if word is not a lowercase a-z word."""
+    if len(word) != WORDLE_MAX_LENGTH:
+        return None
+    codes = [ord(letter) - 97 for letter in word]
+    for code in codes:
+        if code < 0 or code >= ALPHABET_SIZE:
+            return None
+    return codes
+
+
+def feedback(guess: str, word: str) -> str:
+    """Score a guess against the answer, one mark per letter."""
+    result = [ABSENT] * WORDLE_MAX_LENGTH
+    remaining = {}
+    for i, letter in enumerate(word):
+        if guess[i] == letter:
+            result[i] = CORRECT
+        else:
+            remaining[letter] = remaining.get(letter, 0) + 1
+
+    for i, letter in enumerate(guess):
+        if result[i] != CORRECT and remaining.get(letter):
+            result[i] = PRESENT
+            remaining[letter] -= 1
+    return ''.join(result)
+
+
+class WordIndex(object):
+    """Packed, hashed set of five letter words."""
+
+    def __init__(self, words):
+        words = sorted(set(words))
+        self.packed = ''.join(words).encode('ascii')
+        self._codes = array('L')
+
+        bits = max(len(words) * 2, 1).bit_length()
+        self._shift = 32 - bits
+        self._mask = (1 << bits) - 1
+        self._table = array('L', [0]) * (1 << bits)
+
+        for i, word in enumerate(words):
+            code = self._encode(word)
+            if code is None:
+                raise ValueError(f'Invalid word in word list: {word}')
+            self._codes.append(code)
+            slot = self._slot(code)
+            while self._table[slot]:
+                slot = (slot + 1) & self._mask
+            self._table[slot] = i + 1
+
+    @staticmethod
+    def _encode(word):
+        codes = letter_codes(word)
+        if codes is None:
+            return None
+        code = 0
+        for letter_code in codes:
+            code = (code << LETTER_BITS) | letter_code
+        return code
+
+    def _slot(self, code):
+        return ((code * _HASH_MULTIPLIER) & 0xFFFFFFFF) >> self._shift
+
+    def find(self, word: str) -> int:
+        """Position of word in the index, -1 if it is not present."""
+        code = self._encode(word)
+        if code is None:
+            return -1
+        slot = self._slot(code)
+        entry = self._table[slot]
+        while entry:
+            if self._codes[entry - 1] == code:
+                return entry - 1
+            slot = (slot + 1) & self._mask
+            entry = self._table[slot]
+        return -1
+
+    def word(self, position: int) -> str:
+        """Word stored at position."""
+        start = position * WORDLE_MAX_LENGTH
+        return self.packed[start:start + WORDLE_MAX_LENGTH].decode('ascii')
+
+    def random_word(self) -> str:
+        return self.word(random.randrange(len(self)))
+
+    def __contains__(self, word):
+        return isinstance(word, str) and self.find(word) >= 0
+
+    def __len__(self):
+        return len(self._codes)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.word(position)
+
+
+class HardModeConstraints(object):
+    """
+    Constraints implied by the feedback given so far in a game. A guess is
+    consistent when it could still be the answer: greens stay in place,
+    yellows are reused somewhere else and greys are not played again.
+    """
+    __slots__ = ('allowed', 'min_counts', 'max_counts')
+
+    def __init__(self):
+        # Bitmask of the letters still possible at each position
+        self.allowed = [ALL_LETTERS] * WORDLE_MAX_LENGTH
+        self.min_counts = {}
+        self.max_counts = {}
+
+    @classmethod
+    def from_history(cls, guess_history: str, word: str):
+        """Build constraints from a concatenated guess history."""
+        constraints = cls()
+        for i in range(0, len(guess_history) // WORDLE_MAX_LENGTH):
+            guess = guess_history[i * WORDLE_MAX_LENGTH:(i + 1) * WORDLE_MAX_LENGTH]
+            constraints.add(guess, feedback(guess, word))
+        return constraints
+
+    def add(self, guess: str, result: str):
+        """Narrow the constraints with one guess and its feedback."""
+        codes = letter_codes(guess)
+        found = {}
+        for i, code in enumerate(codes):
+            bit = 1 << code
+            if result[i] == CORRECT:
+                self.allowed[i] = bit
+            else:
+                self.allowed[i] &= ~bit
+            if result[i] != ABSENT:
+                found[code] = found.get(code, 0) + 1
+
+        for code, count in found.items():
+            if count > self.min_counts.get(code, 0):
+                self.min_counts[code] = count
+
+        for i, code in enumerate(codes):
+            if result[i] == ABSENT:
+                count = found.get(code, 0)
+                if count < self.max_counts.get(code, WORDLE_MAX_LENGTH):
+                    self.max_counts[code] = count
+                if not count:
+                    for j in range(WORDLE_MAX_LENGTH):
+                        if self.allowed[j] != 1 << code:
+                            self.allowed[j] &= ~(1 << code)
+
+    def allows(self, guess: str) -> bool:
+        """Return True if guess is consistent with every feedback added."""
+        codes = letter_codes(guess)
+        if codes is None:
+            return False
+
+        counts = {}
+        for i, code in enumerate(codes):
+            if not (self.allowed[i] >> code) & 1:
+                return False
+            counts[code] = counts.get(code, 0) + 1
+
+        for code, count in self.min_counts.items():
+            if counts.get(code, 0) < count:
+                return False
+        for code, count in self.max_counts.items():
+            if counts.get(code, 0) > count:
+                return False
+        return True
+
+
+def load_word_index(filename: str) -> WordIndex:
+    with open(os.path.join(CONSTANTS_DIR, filename)) as words_file:
+        return WordIndex(json.load(words_file))
+
+
+@functools.lru_cache(maxsize=None)
+def dictionary() -> WordIndex:
+    """Every word accepted as a guess."""
+    return load_word_index('dictionary.json')
+
+
+@functools.lru_cache(maxsize=None)
+def target_words() -> WordIndex:
+    """Words a wordle can be about."""
+    return load_word_index('targetWords.json')
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from ranker.wordle.models import ArchivedWordle, Wordle, is_archiving, uncount_wordle
+
+
+@receiver(post_delete, sender=Wordle)
+@receiver(post_delete, sender=ArchivedWordle)
+def uncount_deleted_wordle(sender, instance, **kwargs):
+    """Deleted wordles leave the aggregates, those moved to the archive stay."""
+    if not is_archiving():
+        uncount_wordle(instance)
@@ -2,16 +2,21 @@ from django.urls import path
 from rest_framework.routers import DefaultRouter
 from ranker.wordle.views import WordleViewSet
 
+from ranker.core.async_views import read_view
 from ranker.wordle import views
 
 urlpatterns = [
     path('wordle/status', views.WordleStatus.as_view()),
     path('wordle/guess', views.WordleGuess.as_view()),
-    path('wordle/today', views.WordlesToday.as_view()),
+    path('wordle/today', read_view(views.WordlesToday, views.AsyncWordlesToday)),
     path('wordle/shame', views.WordleWallOfShame.as_view()),
     path('wordle/leaders/guesses', views.WordleLeadersGuesses.as_view()),
     path('wordle/leaders/time', views.WordleLeadersTime.as_view()),
-    path('wordle/stats', views.WordleStats.as_view()),
+    path('wordle/stats', read_view(views.WordleStats, views.AsyncWordleStats)),
+    path('wordle/<int:wordle_id>/analysis', views.WordleAnalysis.as_view()),
+    path('wordle/rollup/distribution', views.WordleRollupDistribution.as_view()),
+    path('wordle/rollup/words', views.WordleRollupWords.as_view()),
+    path('wordle/rollup/timeseries', views.WordleRollupTimeseries.as_view()),
 ]
 
 router = DefaultRouter()
@@ -3,13 +3,10 @@ from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.utils import timezone
 from django.forms.models import model_to_dict
-from django.db.models import Avg, Count
-from django.db.models.expressions import Window
-from django.db.models.functions import RowNumber
-from django.db.models import F
 
 
 from rest_framework.authentication import SessionAuthentication
+from ranker.users.authentication import CachedTokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
 
@@ -18,13 +15,14 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import viewsets
 
+import asyncio
 import datetime
 
-import json, os, random
-from ranker.settings.dev import BASE_DIR
 
+from ranker.core.async_views import AsyncAPIView, APIJsonResponse, run_query
+from ranker.core.pagination import NewestFirstCursorPagination, stream_json, stream_requested
 from ranker.wordle.models import (
-    Wordle, ActiveWordle
+    Wordle, ActiveWordle, WordleRollup
 )
 from ranker.users.models import (
     Player,
@@ -39,206 +37,256 @@ from ranker.users.serializers import (
     PlayerSerializer,
 )
 
-from ranker.wordle.constants.wordle import WORDLE_MAX_LENGTH, WORDLE_NUM_GUESSES
-wordle_target_words = json.load(open(os.path.join(BASE_DIR, 'ranker/wordle/constants/targetWords.json')))
-
-
-def wordle_streak(player):
-    """
-    Returns how many days in a row a player has played (aka a players streak)
-    """
-    current_streak = 0
-    streak_day = datetime.date.today()
-
-    wordles = Wordle.objects.filter(player=player, date__lte = streak_day).values("date", "fail").order_by("-date")
-
-    for wordle in wordles:
-        date = wordle['date']
-        fail = wordle['fail']
-
-        if (not fail) and (date == streak_day):
-            current_streak += 1
-            streak_day -= datetime.timedelta(days=1)
-        else:  # Awwww...
-            break  # The current streak is done, exit the loop
-
-    return current_streak
-
+from ranker.wordle.constants.wordle import (
+    WORDLE_MAX_LENGTH, WORDLE_NUM_GUESSES
+)
+from ranker.wordle.services.words import HardModeConstraints, target_words
+from ranker.wordle.services import boards, leaders, rollups, sessions
 
 
 class WordleStatus(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        try:
-            wordle = Wordle.objects.get(player=request.user, date=timezone.now().date())
-            active_wordle = ActiveWordle.objects.get(player=request.user)
-        except Wordle.DoesNotExist:
-            try:
-                active_wordle = ActiveWordle.objects.get(player=request.user)
-                if active_wordle.date != timezone.now().date():
-                    # If the user never completes their wordle for the day
-                    active_wordle.delete()
-                    active_wordle = ActiveWordle(word="?", guess_history="")
-            except ActiveWordle.DoesNotExist:
-                active_wordle = ActiveWordle(word="?", guess_history="")
-        except ActiveWordle.DoesNotExist:
-            # this should never happen, if it does there is a problem
-            guess_history = "?"*WORDLE_MAX_LENGTH*(wordle.guesses-1)+wordle.word
-            active_wordle = ActiveWordle(word=wordle.word, guess_history=guess_history)
-        except:
-            return Response(status=status.HTTP_404_NOT_FOUND)
+        active_wordle = sessions.load(request.user.id, timezone.now().date())
+        if active_wordle is None:
+            active_wordle = ActiveWordle(word="?", guess_history="")
         serializer = ActiveWordleSerializer(active_wordle)
         return Response(serializer.data)
 
-    
-
 
 class WordleGuess(APIView):
-    authentication_classes = [SessionAuthentication]
+    """
+    Play a guess in today's wordle, under a per-player lock. On an in-memory
+    wordle cache the game state lives there until it finishes, otherwise on
+    its ActiveWordle row (see ranker.wordle.services.sessions).
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = WordleGuessSerializer
 
     def post(self, request):
-        active_wordles = ActiveWordle.objects.filter(player=request.user, start_time__date=timezone.now().date())
-        daily_wordles = Wordle.objects.filter(player=request.user, date=timezone.now().date())
-
-        if len(active_wordles) == 0 and len(daily_wordles) == 0:
-            guess_serializer = WordleGuessSerializer(data=request.data)
-            if guess_serializer.is_valid():
-                # Deletes the old active wordle for the player if one exists
-                active_wordles = ActiveWordle.objects.filter(player=request.user).delete()
-
-                word = random.choice(wordle_target_words)
-                active_wordle = ActiveWordle.objects.create(
-                    player=request.user, 
-                    guess_history=request.data['guess'], 
-                    word=word
-                )
-                serializer = ActiveWordleSerializer(active_wordle)
-                return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
-            else:
-                return Response(status=status.HTTP_400_BAD_REQUEST)
-
-        # If an active wordle for the user exists and they have no wordles
-        # on record for that day validate their guess 
-        elif len(active_wordles) == 1 and len(daily_wordles) == 0:
-            active_wordle = active_wordles[0]
-            if active_wordle.guesses >= WORDLE_NUM_GUESSES:
-                return Response(status=status.HTTP_400_BAD_REQUEST)
-
-            guess_serializer = WordleGuessSerializer(data=request.data)
-            if guess_serializer.is_valid():
-                active_wordle.guess_history += request.data['guess']
-                active_wordle.save()
-                serializer = ActiveWordleSerializer(active_wordle)
-                
-                if active_wordle.guesses == WORDLE_NUM_GUESSES or active_wordle.solved:
-                    Wordle.objects.create(
-                        player=request.user, 
-                        word=active_wordle.word,
-                        guesses=active_wordle.guesses,
-                        date=active_wordle.date,
-                        time=timezone.now()-active_wordle.start_time,
-                        fail=not active_wordle.solved
-                    )
-                return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
-            
-            else:
-                return Response(status=status.HTTP_400_BAD_REQUEST)
-        elif len(active_wordles) == 1 and len(daily_wordles) == 1:
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        elif len(active_wordles) > 1:
-            active_wordles[0].delete()
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        else:
+        guess_serializer = WordleGuessSerializer(data=request.data)
+        if not guess_serializer.is_valid():
             return Response(status=status.HTTP_400_BAD_REQUEST)
+        guess = guess_serializer.validated_data['guess']
+
+        try:
+            with sessions.player_lock(request.user.id):
+                active_wordle = sessions.load(request.user.id, timezone.now().date())
+                if active_wordle is None:
+                    active_wordle = sessions.start(request.user.id, target_words().random_word())
+                elif active_wordle.finished or active_wordle.guesses >= WORDLE_NUM_GUESSES:
+                    return Response(status=status.HTTP_400_BAD_REQUEST)
+                elif guess_serializer.validated_data['hard_mode']:
+                    constraints = HardModeConstraints.from_history(active_wordle.guess_history, active_wordle.word)
+                    if not constraints.allows(guess):
+                        return Response(
+                            {'guess': ['Guess must use the hints revealed so far']},
+                            status=status.HTTP_400_BAD_REQUEST
+                        )
+
+                active_wordle.guess_history += guess
+                if active_wordle.guesses == WORDLE_NUM_GUESSES or active_wordle.solved:
+                    sessions.finish(active_wordle)
+                sessions.save(active_wordle)
+        except sessions.SessionLocked:
+            return Response(status=status.HTTP_409_CONFLICT)
+
+        serializer = ActiveWordleSerializer(active_wordle)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
 class WordleViewSet(viewsets.ViewSet):
     """
-    A simple ViewSet for listing or retrieving Wordles.
+    A simple ViewSet for listing or retrieving Wordles. The list is cursor
+    paginated, pass ?stream=true to stream every wordle as one JSON array.
     """
     def list(self, request):
-        queryset = Wordle.objects.all()
-        serializer = WordleSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = Wordle.objects.select_related('player').order_by('-id')
+        if stream_requested(request):
+            return stream_json(queryset, WordleSerializer)
+
+        paginator = NewestFirstCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = WordleSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
 
     def retrieve(self, request, pk=None):
-        queryset = Wordle.objects.all()
+        queryset = Wordle.objects.select_related('player')
         daily_wordle = get_object_or_404(queryset, pk=pk)
         serializer = WordleSerializer(daily_wordle)
         return Response(serializer.data)
 
+class WordleAnalysis(APIView):
+    """
+    Post-game analysis of one of the player's finished wordles: candidates
+    left and information gained by each guess. Pass ?hint=true to include
+    the entropy-optimal guess for every step.
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, wordle_id):
+        # numpy and the feedback matrix are only loaded by workers serving analyses
+        from ranker.wordle.services import analysis
+
+        # Only the player's own, another player's game would give away the day's word
+        try:
+            wordle = Wordle.objects.get(pk=wordle_id, player=request.user)
+        except Wordle.DoesNotExist:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        if not wordle.guess_history:
+            return Response({'detail': 'No guesses were recorded for this wordle'}, status=status.HTTP_404_NOT_FOUND)
+
+        hints = request.query_params.get('hint', '').lower() in ('1', 'true')
+        try:
+            steps = analysis.analyse_game(wordle.guess_list, wordle.word, hints=hints)
+        except analysis.FeedbackMatrixUnavailable as error:
+            return Response({'detail': str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'id': wordle.id,
+            'word': wordle.word,
+            'fail': wordle.fail,
+            'steps': steps,
+        })
+
+
 class WordlesToday(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = WordleSerializer
 
     def get(self, request):
-        queryset = Wordle.objects.filter(
-            date=timezone.now().date()
-        ).order_by('fail', 'guesses', 'time').annotate(
-            rank=Window(
-                expression=RowNumber(),
-                order_by=['fail', 'guesses', 'time']
-            )
-        )
-        for obj in queryset:
-            obj.streak = wordle_streak(obj.player)
-            # print(streak, flush=True)
+        return Response(boards.get_today_board())
 
-        serializer = WordleSerializer(queryset, many=True)
-        return Response(serializer.data)
+
+class AsyncWordlesToday(AsyncAPIView):
+
+    async def get(self, request):
+        return APIJsonResponse(await run_query(boards.get_today_board))
 
 class WordleLeadersTime(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = PlayerSerializer
 
     def get(self, request):
-
-        queryset = Player.objects.annotate(avg_time=Avg('wordle__time'), total_wordles=Count('wordle')).filter(total_wordles__gte=10).order_by('avg_time')[:5]       
-        serializer = PlayerSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(leaders.top_players('avg_time'))
 
 
 class WordleLeadersGuesses(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = PlayerSerializer
 
     def get(self, request):
-
-        queryset = Player.objects.annotate(avg_guesses=Avg('wordle__guesses'), total_wordles=Count('wordle')).filter(total_wordles__gte=10).order_by('avg_guesses')[:5]
-        for player in queryset:
-            print(player, flush=True)
-        serializer = PlayerSerializer(queryset, many=True)
-        return Response(serializer.data)
+        return Response(leaders.top_players('avg_guesses'))
 
 class WordleStats(APIView):
-    authentication_classes = [SessionAuthentication]
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = PlayerSerializer
 
     def get(self, request):
+        return Response(leaders.wordle_stats())
+
+
+class AsyncWordleStats(AsyncAPIView):
+
+    async def get(self, request):
+        num_wordles, num_players = await asyncio.gather(
+            run_query(Wordle.objects.count),
+            run_query(Player.objects.count),
+        )
+
+        return APIJsonResponse({'num_wordles': num_wordles, 'num_players': num_players})
+
+
+def rollup_params(request):
+    """Granularity, date and optional player of a rollup query, ValueError if malformed."""
+    granularity = request.query_params.get('granularity', WordleRollup.WEEK)
+    if granularity not in dict(WordleRollup.GRANULARITY_CHOICES):
+        raise ValueError(f'Unknown granularity {granularity}')
+    date = request.query_params.get('date')
+    date = datetime.date.fromisoformat(date) if date else timezone.now().date()
+    player = request.query_params.get('player')
+    return granularity, date, int(player) if player else None
 
-        num_wordles = Wordle.objects.all().count()
-        num_players = Player.objects.all().count()
 
-        response = {}
-        response['num_wordles'] = num_wordles
-        response['num_players'] = num_players
+class WordleRollupDistribution(APIView):
+    """
+    Guess distribution for the day, week or month containing ?date, for
+    one ?player or everybody
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
 
-        return Response(response)
+    def get(self, request):
+        try:
+            granularity, date, player_id = rollup_params(request)
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(rollups.get_distribution(granularity=granularity, date=date, player_id=player_id))
+
+
+class WordleRollupWords(APIView):
+    """
+    Hardest words of the day, week or month containing ?date
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            granularity, date, _player_id = rollup_params(request)
+            limit = int(request.query_params.get('limit', 10))
+            min_count = int(request.query_params.get('min_count', 1))
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(rollups.get_word_difficulty(
+            granularity=granularity, date=date, limit=min(limit, 100), min_count=min_count
+        ))
+
+
+class WordleRollupTimeseries(APIView):
+    """
+    Wordles played, fails and averages for the last ?periods days, weeks or
+    months, for one ?player or everybody
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        try:
+            granularity, date, player_id = rollup_params(request)
+            periods = int(request.query_params.get('periods', 30))
+        except ValueError as error:
+            return Response({'detail': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(rollups.get_timeseries(
+            granularity=granularity, periods=max(1, min(periods, 366)), date=date, player_id=player_id
+        ))
 
 
 class WordleWallOfShame(APIView):
-    authentication_classes = [SessionAuthentication]
+    """
+    Failed wordles, newest first and cursor paginated. Pass ?stream=true
+    to stream all of them as one JSON array.
+    """
+    authentication_classes = [SessionAuthentication, CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
     serializer_class = WordleSerializer
 
     def get(self, request):
-        queryset = Wordle.objects.filter(fail=True)
-        serializer = WordleSerializer(queryset, many=True)
-        return Response(serializer.data)
+        queryset = Wordle.objects.filter(fail=True).select_related('player').order_by('-id')
+        if stream_requested(request):
+            return stream_json(queryset, WordleSerializer)
+
+        paginator = NewestFirstCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = WordleSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
@@ -1,3 +1,4 @@
 ./manage.py makemigrations
 ./manage.py migrate
 ./manage.py createcachetable
+./manage.py warm_caches
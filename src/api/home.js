@@ -0,0 +1,8 @@
+import session from './session';
+
+export default {
+    sections(names) {
+        const params = names ? { sections: names.join(',') } : {};
+        return session.get('api/v1/home', { params });
+    },
+};
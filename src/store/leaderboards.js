@@ -1,3 +1,4 @@
+import home from '../api/home';
 import wordle from '../api/wordle';
 import {
     WORDLE_TODAY_BEGIN,
@@ -12,8 +13,22 @@ import {
     WORDLE_LEADERS_TIME_BEGIN,
     WORDLE_LEADERS_TIME_SUCCESS,
     WORDLE_LEADERS_TIME_ERROR,
+    WORDLE_STATS_BEGIN,
+    WORDLE_STATS_ERROR,
+    WORDLE_STATS_SUCCESS,
 } from './types';
 
+// Home page section: [begin, success, error] mutations by their root name,
+// wordle stats live in the wordle module
+const local = (types) => types.map((type) => `leaderboards/${type}`);
+const HOME_SECTIONS = {
+    wordle_today: local([WORDLE_TODAY_BEGIN, WORDLE_TODAY_SUCCESS, WORDLE_TODAY_ERROR]),
+    wordle_shame: local([WORDLE_SHAME_BEGIN, WORDLE_SHAME_SUCCESS, WORDLE_SHAME_ERROR]),
+    wordle_leaders_guesses: local([WORDLE_LEADERS_GUESSES_BEGIN, WORDLE_LEADERS_GUESSES_SUCCESS, WORDLE_LEADERS_GUESSES_ERROR]),
+    wordle_leaders_time: local([WORDLE_LEADERS_TIME_BEGIN, WORDLE_LEADERS_TIME_SUCCESS, WORDLE_LEADERS_TIME_ERROR]),
+    wordle_stats: [`wordle/${WORDLE_STATS_BEGIN}`, `wordle/${WORDLE_STATS_SUCCESS}`, `wordle/${WORDLE_STATS_ERROR}`],
+};
+
 
 const initialState = {
     wordle: {
@@ -36,6 +51,20 @@ const getters = {
 };
 
 const actions = {
+    // All home page sections in one request, or only the given ones to refresh them
+    home({ commit }, names = Object.keys(HOME_SECTIONS)) {
+        names.forEach((name) => commit(HOME_SECTIONS[name][0], undefined, { root: true }));
+        return home.sections(names)
+            .then(({ data }) => names.forEach((name) => {
+                const [, success, error] = HOME_SECTIONS[name];
+                if (name in data.sections) {
+                    commit(success, data.sections[name], { root: true });
+                } else {
+                    commit(error, {}, { root: true });
+                }
+            }))
+            .catch(() => names.forEach((name) => commit(HOME_SECTIONS[name][2], {}, { root: true })));
+    },
     todaysWordles({ commit }) {
         commit(WORDLE_TODAY_BEGIN);
         return wordle.today()
@@ -45,7 +74,7 @@ const actions = {
     wordleFails({ commit }) {
         commit(WORDLE_SHAME_BEGIN);
         return wordle.shame()
-            .then(({ data }) => commit(WORDLE_SHAME_SUCCESS, data))
+            .then(({ data }) => commit(WORDLE_SHAME_SUCCESS, data.results))
             .catch((error) => commit(WORDLE_SHAME_ERROR));
     },
     wordleAvgGuesses({ commit }) {
@@ -1 +1 @@
-python3 manage.py collectstatic --noinput && python3 manage.py makemigrations users wordle core && python3 manage.py migrate && python3 manage.py createcachetable && python3 manage.py runserver 0.0.0.0:80
\ No newline at end of file
+python3 manage.py collectstatic --noinput && python3 manage.py makemigrations users wordle core && python3 manage.py migrate && python3 manage.py createcachetable && python3 manage.py build_feedback_matrix && { python3 manage.py run_jobs & } && python3 manage.py runserver 0.0.0.0:80
\ No newline at end of file